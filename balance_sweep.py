@@ -0,0 +1,298 @@
+"""Headless balance sweeps: scripted players over a parameter grid, on every core.
+
+Example:
+    python balance_sweep.py --param shot_delay=150,250,350 --param LEVEL_3_SPEED=2,3 --seeds 8
+
+Any numeric upper-case constant in game.py that a headless run reads can be swept,
+plus shot_delay (per Game) and enemy_spawn_delay (burst delay of every level's spawn
+plan). Values for integer constants must be whole numbers.
+"""
+import os
+
+# Workers never open a window; set before Game() starts SDL
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+# Leave SIGTERM/SIGINT alone so the pool can stop its workers
+os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+
+import argparse
+import copy
+import csv
+import itertools
+import math
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+
+import game
+
+# Parameters that are not module constants; both are whole milliseconds
+GAME_PARAMETERS = ('shot_delay', 'enemy_spawn_delay')
+
+# Constants a headless trial never reads (file formats, rendering, I/O, and the
+# BURST_* fire settings nothing uses yet), so a sweep over them would silently
+# change nothing
+FIXED_CONSTANTS = {
+    'BURST_COUNT', 'BURST_DELAY',
+    'ASSET_BUNDLE_VERSION', 'SNAPSHOT_VERSION', 'TELEMETRY_VERSION',
+    'RENDER_FPS', 'ASYNC_SLOW_MS', 'BACKGROUND_WORKERS', 'GAMEPAD_DEADZONE',
+    'TELEMETRY_RING_CAPACITY', 'TELEMETRY_FLUSH_INTERVAL', 'TELEMETRY_ROTATE_BYTES',
+}
+
+# Numeric module constants and spawn plans as shipped; restored before every
+# trial because pool workers run many trials
+DEFAULT_CONSTANTS = {
+    name: getattr(game, name) for name in dir(game)
+    if name.isupper() and type(getattr(game, name)) in (int, float)
+}
+DEFAULT_SPAWN_PLANS = copy.deepcopy(game.LEVEL_SPAWN_PLANS)
+
+def check_parameters(params):
+    """Validate (name, values) pairs and convert values to each parameter's type"""
+    checked = []
+    for name, values in params:
+        if name in GAME_PARAMETERS:
+            kind = int
+        elif name in FIXED_CONSTANTS:
+            raise ValueError(f"'{name}' has no gameplay effect in a headless run")
+        elif name in DEFAULT_CONSTANTS:
+            kind = type(DEFAULT_CONSTANTS[name])
+        else:
+            raise ValueError(f"unknown parameter '{name}'")
+        # Integer parameters end up in struct-packed snapshots and frame counts
+        if kind is int and any(value != int(value) for value in values):
+            raise ValueError(f"'{name}' takes whole numbers")
+        checked.append((name, [kind(value) for value in values]))
+    return checked
+
+def apply_parameters(params):
+    for name, value in DEFAULT_CONSTANTS.items():
+        setattr(game, name, value)
+    game.LEVEL_SPAWN_PLANS = copy.deepcopy(DEFAULT_SPAWN_PLANS)
+    for name, value in params.items():
+        if name not in GAME_PARAMETERS:
+            setattr(game, name, value)
+    # Spawn plans take their totals from LEVEL_n_ENEMIES
+    for level, plan in game.LEVEL_SPAWN_PLANS.items():
+        plan['total'] = getattr(game, f'LEVEL_{level}_ENEMIES')
+        if 'enemy_spawn_delay' in params:
+            plan['delay'] = params['enemy_spawn_delay']
+
+def direction_keys(dx, dy):
+    """Movement actions for the 8-way direction closest to (dx, dy)"""
+    held = set()
+    threshold = 0.4 * math.hypot(dx, dy)  # roughly tan(22.5 degrees)
+    if dx < -threshold:
+        held.add('move_left')
+    elif dx > threshold:
+        held.add('move_right')
+    if dy < -threshold:
+        held.add('move_up')
+    elif dy > threshold:
+        held.add('move_down')
+    return held
+
+def key_signs(held):
+    return (('move_right' in held) - ('move_left' in held),
+            ('move_down' in held) - ('move_up' in held))
+
+def heading(vector):
+    """Per-axis sign of a unit direction, matching key_signs"""
+    return tuple(0 if abs(component) < 0.3 else (1 if component > 0 else -1) for component in vector)
+
+def make_controls(held, pressed=()):
+    pressed = frozenset(pressed)
+    return game.InputState(frozenset(held) | pressed, pressed, (0, 0), (False, False, False), (), False)
+
+class IdleBot:
+    """Never moves or fires; a baseline for how fast the horde wins"""
+    def controls(self, g):
+        return make_controls(())
+
+class TurretBot:
+    """Holds position, turns toward the nearest zombie and fires whenever it can"""
+    sing_range = 90
+    flee_range = None
+
+    def controls(self, g):
+        player = g.player
+        if not g.enemies:
+            return make_controls(())
+        target = min(g.enemies, key=lambda enemy: math.hypot(enemy.rect.centerx - player.rect.centerx,
+                                                            enemy.rect.centery - player.rect.centery))
+        dx = target.rect.centerx - player.rect.centerx
+        dy = target.rect.centery - player.rect.centery
+        distance = math.hypot(dx, dy)
+        toward = direction_keys(dx, dy)
+
+        pressed = set()
+        if distance < self.sing_range:
+            pressed.add('sing')
+
+        # Shots go along last tick's movement, so aim for a tick before firing
+        if key_signs(toward) != heading(player.last_direction):
+            return make_controls(toward, pressed)
+        held = {'fire'}
+        if self.flee_range is not None and distance < self.flee_range:
+            held |= direction_keys(-dx, -dy)
+        return make_controls(held, pressed)
+
+class KiterBot(TurretBot):
+    """Like the turret, but backs away from zombies that get close"""
+    flee_range = 160
+
+BOTS = {'idle': IdleBot, 'turret': TurretBot, 'kiter': KiterBot}
+
+def run_trial(task):
+    """Play one headless game on a virtual clock and return its statistics"""
+    params, seed, bot_name, max_seconds = task
+    apply_parameters(params)
+    random.seed(seed)
+
+    clock = [0]
+    game.set_time_source(lambda: clock[0])
+    g = game.Game(gamepad=False)
+    if 'shot_delay' in params:
+        g.shot_delay = params['shot_delay']
+    bot = BOTS[bot_name]()
+
+    frame_costs = []
+    kills = 0
+    tick = 0
+    tick_ms = 1000 / game.FPS
+    try:
+        g.reset_game()
+        while clock[0] < max_seconds * 1000 and not g.game_over:
+            tick += 1
+            clock[0] = int(tick * tick_ms)
+            controls = bot.controls(g)
+            killed_before = g.enemies_killed
+
+            start = time.perf_counter()
+            g.apply_input(controls)
+            g.update_world()
+            frame_costs.append((time.perf_counter() - start) * 1000)
+
+            # enemies_killed restarts from zero at each new level
+            if g.enemies_killed >= killed_before:
+                kills += g.enemies_killed - killed_before
+            else:
+                kills += g.enemies_killed
+    finally:
+        # Workers run many trials: drop this game's GC hook and thresholds
+        g.gc_control.close()
+
+    survived = (g.player.death_start_time if g.player.is_dead else clock[0]) / 1000
+    frame_costs.sort()
+    return dict(
+        params,
+        seed=seed,
+        bot=bot_name,
+        survived_s=round(survived, 2),
+        died=g.player.is_dead,
+        completed=g.game_over and not g.player.is_dead,
+        level=g.level,
+        kills=kills,
+        kills_per_s=round(kills / survived, 3) if survived else 0.0,
+        frame_mean_ms=round(statistics.fmean(frame_costs), 4),
+        frame_p95_ms=round(frame_costs[int(len(frame_costs) * 0.95)], 4),
+        frame_max_ms=round(frame_costs[-1], 4),
+        ticks=tick,
+    )
+
+def summarize(results, names):
+    """One row per parameter combination, averaged over seeds"""
+    groups = {}
+    for row in results:
+        groups.setdefault(tuple(row[name] for name in names), []).append(row)
+    summary = []
+    for key in sorted(groups):
+        rows = groups[key]
+        summary.append(dict(
+            zip(names, key),
+            runs=len(rows),
+            survived_s=round(statistics.fmean(row['survived_s'] for row in rows), 1),
+            deaths=sum(row['died'] for row in rows),
+            completed=sum(row['completed'] for row in rows),
+            kills_per_s=round(statistics.fmean(row['kills_per_s'] for row in rows), 3),
+            frame_p95_ms=round(statistics.fmean(row['frame_p95_ms'] for row in rows), 3),
+            frame_max_ms=round(max(row['frame_max_ms'] for row in rows), 3),
+        ))
+    return summary
+
+def print_table(rows):
+    if not rows:
+        return
+    columns = list(rows[0])
+    widths = [max(len(column), *(len(str(row[column])) for row in rows)) for column in columns]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(str(row[column]).rjust(width) for column, width in zip(columns, widths)))
+
+def parse_value(text):
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"'{text}' is not a number")
+
+def parse_param(text):
+    name, _, values = text.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=v1,v2,... but got '{text}'")
+    return name, [parse_value(value) for value in values.split(',')]
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless balance sweeps across a process pool")
+    parser.add_argument('--param', type=parse_param, action='append', default=[],
+                        help="NAME=v1,v2,... (repeat for a grid)")
+    parser.add_argument('--seeds', type=int, default=4, help="runs per combination")
+    parser.add_argument('--bot', choices=sorted(BOTS), default='kiter')
+    parser.add_argument('--max-seconds', type=float, default=300, help="simulated time limit per run")
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--csv', help="also write every run to this CSV file")
+    args = parser.parse_args()
+
+    try:
+        args.param = check_parameters(args.param)
+    except ValueError as error:
+        parser.error(str(error))
+    names = [name for name, _ in args.param]
+
+    tasks = [
+        (dict(zip(names, combo)), seed, args.bot, args.max_seconds)
+        for combo in itertools.product(*(values for _, values in args.param))
+        for seed in range(args.seeds)
+    ]
+
+    # Spawn (not fork) so every worker initializes its own headless pygame
+    results = []
+    started = time.perf_counter()
+    pool = multiprocessing.get_context('spawn').Pool(args.processes)
+    try:
+        for result in pool.imap_unordered(run_trial, tasks):
+            results.append(result)
+            print(f"\r{len(results)}/{len(tasks)} runs", end='', file=sys.stderr, flush=True)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    print(f"\r{len(tasks)} runs in {time.perf_counter() - started:.1f}s on {args.processes} processes",
+          file=sys.stderr)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(sorted(results, key=lambda row: [row[name] for name in names] + [row['seed']]))
+
+    print_table(summarize(results, names))
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,33 @@ import pygame
 import random
 import math
 import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+import time
+import threading
+import asyncio
+import logging
+import gc
+import tracemalloc
+from array import array
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pygame.transform import scale, flip
 
-# Initialize Pygame
-pygame.init()
+# Importing this module initializes nothing; Game starts the SDL subsystems it uses
 
 # Constants
-WINDOW_WIDTH = 800
+WINDOW_WIDTH = 800  # Logical canvas size; every position and offset is in these units
 WINDOW_HEIGHT = 600
+CANVAS_SMOOTH_SCALE = False  # Nearest-neighbour keeps the pixel art crisp when the window is larger
 FPS = 60
+RENDER_FPS = 120  # Frame cap for the renderer in threaded mode; the simulation stays at FPS
+ASYNC_SLOW_MS = 1000 / FPS  # In async mode, report anything holding the event loop longer than a frame
+BACKGROUND_WORKERS = 2  # Executor threads for file I/O and asset decoding in async mode
+SCORES_PATH = 'scores.jsonl'  # Finished runs, one JSON object per line
 
 # Colors
 WHITE = (255, 255, 255)
@@ -30,50 +48,646 @@ ARC_PROJECTILE_COUNT = 5  # Number of projectiles in the arc
 ARC_SPREAD = 60  # Spread angle in degrees
 BURST_COUNT = 3  # Number of bursts
 BURST_DELAY = 100  # Milliseconds between bursts
+PROJECTILE_SPEED = 10  # Pixels per tick
+PROJECTILE_LIFETIME = 500  # milliseconds
+PROJECTILE_ANGLE_BUCKETS = 72  # Pre-rotated bullet images, 5 degrees apart
+MASK_SWEEP_STEP = 2  # Pixels between mask tests along a bullet's path
+PARTICLE_CAPACITY = 4096  # Preallocated particle slots; new particles are dropped when all are live
+PARTICLE_DRAG = 0.9  # Fraction of a particle's velocity kept each tick
 
-class Projectile(pygame.sprite.Sprite):
-    def __init__(self, x, y, direction, speed=10):
-        super().__init__()
+# Zombie types: walk/attack sheets as (file, frame count) in the type's folder, a
+# multiplier on the level speed, collision box size, attack range and sprite offset.
+# Snapshots store a type's position in this dict, so add new types at the end.
+ZombieType = namedtuple('ZombieType', 'folder walk attack speed_scale hitbox attack_range sprite_offset')
+ZOMBIE_TYPES = {
+    'walker': ZombieType('Zombie Man', ('Walk.png', 8), ('Attack_1.png', 5), 1.0, (12, 24), 50, (-25, -60)),
+    'woman': ZombieType('Zombie Woman', ('Walk.png', 7), ('Attack_1.png', 4), 1.25, (12, 24), 45, (-25, -60)),
+    'runner': ZombieType('Zombie Man', ('Run.png', 7), ('Bite.png', 11), 1.75, (12, 24), 40, (-25, -60)),
+}
+DEFAULT_ZOMBIE_TYPE = 'walker'
+
+# Spawn plans per level: ms between bursts, zombies per burst, zombies in the level,
+# and relative weights of the zombie types in the level
+LEVEL_SPAWN_PLANS = {
+    1: {'delay': 1000, 'burst': 1, 'total': LEVEL_1_ENEMIES, 'mix': {'walker': 1}},
+    2: {'delay': 1500, 'burst': 3, 'total': LEVEL_2_ENEMIES, 'mix': {'walker': 3, 'woman': 1}},  # Longer delay for multiple spawns
+    3: {'delay': 1000, 'burst': 2, 'total': LEVEL_3_ENEMIES, 'mix': {'walker': 2, 'woman': 1, 'runner': 1}},
+}
+SPAWN_BUDGET_MS = 2.0  # Max time per frame spent constructing enemies
+
+# Rollback snapshots: one every SNAPSHOT_INTERVAL ticks, SNAPSHOT_HISTORY kept in memory
+SNAPSHOT_INTERVAL = 30
+SNAPSHOT_HISTORY = 20
+CHECKPOINT_PATH = 'checkpoint.bin'  # Start of the current level, for resuming with --resume
+
+# Cyclic GC: full collections only at transitions and menus while GC_MANAGED is on
+GC_MANAGED = True
+GC_GAMEPLAY_GEN2_THRESHOLD = 1000000  # Effectively never triggers a gen-2 pass mid-wave
+GC_PAUSE_HISTORY = 512  # Most recent collections kept for attribution
+
+# Telemetry: events go through a ring buffer to a writer thread that appends them to disk
+TELEMETRY_RING_CAPACITY = 8192  # Events buffered between flushes; more are dropped, never waited on
+TELEMETRY_FLUSH_INTERVAL = 0.5  # Seconds between writer batches
+TELEMETRY_ROTATE_BYTES = 4 * 1024 * 1024  # Start a new file past this size
+TELEMETRY_MAGIC = b'ZQTL'
+TELEMETRY_VERSION = 1
+TELEMETRY_HEADER = struct.Struct('<4sHd')  # magic, version, session start (Unix time)
+TELEMETRY_RECORD = struct.Struct('<BIfff')  # event code, game ms, up to three values
+# Event name -> (field, type) pairs; an event's code is its position here. Binary
+# records store every value as a float, so the types restore ints and bools on read
+TELEMETRY_EVENTS = {
+    'level_start': (('level', int),),
+    'level_complete': (('level', int), ('duration_ms', int), ('damage_taken', int)),
+    'kill': (('level', int), ('zombie_type', int), ('by_sing', bool)),
+    'damage': (('amount', int), ('health', int), ('level', int)),
+    'death': (('level', int), ('kills', int)),
+    'frame': (('update_ms', float), ('draw_ms', float)),
+    'dropped': (('count', int),),
+}
+
+# Baked asset bundle: pre-sliced, pre-flipped raw frames (see bake_asset_bundle)
+ASSET_BUNDLE_PATH = os.path.join('assets', 'bundle.bin')
+ASSET_BUNDLE_MAGIC = b'ZQAB'
+ASSET_BUNDLE_VERSION = 1
+ASSET_BUNDLE_HEADER = struct.Struct('<4sII')  # magic, version, index length
+BUNDLE_PIXEL_FORMAT = 'BGRA'  # Same byte order as a 32-bit display surface
+BUNDLED_ANIMATIONS = [
+    ('Soldier_1', 'Walk.png', 7),
+    ('Soldier_1', 'Shot_1.png', 4),
+    ('Soldier_1', 'Hurt.png', 3),
+    ('Soldier_1', 'Recharge.png', 13),
+    ('Soldier_1', 'Dead.png', 4),
+    ('Soldier_1', 'Explosion.png', 9),
+] + [
+    (zombie_type.folder, *sheet)
+    for zombie_type in ZOMBIE_TYPES.values() for sheet in (zombie_type.walk, zombie_type.attack)
+]
+BUNDLED_SCREEN_IMAGES = ['foreground.png', 'background1.png', 'background2.png', 'background3.png']
+
+# Millisecond clock behind every gameplay timer; headless runs install a virtual one.
+# pygame.time.get_ticks() stays at 0 unless pygame.init() ran, so count from import instead.
+_clock_origin = time.perf_counter()
+
+def _monotonic_ticks():
+    return int((time.perf_counter() - _clock_origin) * 1000)
+
+_time_source = _monotonic_ticks
+
+def get_ticks():
+    return _time_source()
+
+def set_time_source(source):
+    """Replace the gameplay clock, e.g. with a simulated one that advances per tick"""
+    global _time_source
+    _time_source = source
+
+# Input bindings: action name -> keys / gamepad buttons that trigger it
+DEFAULT_KEY_BINDINGS = {
+    'move_up': (pygame.K_w,),
+    'move_down': (pygame.K_s,),
+    'move_left': (pygame.K_a,),
+    'move_right': (pygame.K_d,),
+    'fire': (pygame.K_SPACE,),
+    'sing': (pygame.K_e,),
+    'skip_level': (pygame.K_t,),
+    'retry_level': (pygame.K_r,),
+    'rewind': (pygame.K_BACKSPACE,),
+    'quit': (pygame.K_ESCAPE,),
+}
+DEFAULT_PAD_BINDINGS = {
+    'fire': (0,),  # A / Cross
+    'sing': (1,),  # B / Circle
+    'quit': (7,),  # Start
+}
+GAMEPAD_DEADZONE = 0.3  # Stick deflection needed to count as movement
+
+class InputState(namedtuple('InputState', 'held pressed mouse_pos mouse_buttons clicks quit_requested')):
+    """Immutable snapshot of keyboard, mouse and gamepad state for one tick"""
+    __slots__ = ()
+
+    def is_held(self, action):
+        return action in self.held
+
+    def was_pressed(self, action):
+        return action in self.pressed
+
+EMPTY_INPUT = InputState(frozenset(), frozenset(), (0, 0), (False, False, False), (), False)
+
+class InputHandler:
+    def __init__(self, key_bindings=None, pad_bindings=None, gamepad=True):
+        self.key_bindings = dict(DEFAULT_KEY_BINDINGS if key_bindings is None else key_bindings)
+        self.pad_bindings = dict(DEFAULT_PAD_BINDINGS if pad_bindings is None else pad_bindings)
+        self.joysticks = {}
+        self.state = EMPTY_INPUT
+        self._rebuild_lookups()
+        # Gamepads arrive as JOYDEVICEADDED events once the joystick subsystem is up
+        if gamepad and self.pad_bindings:
+            pygame.joystick.init()
+
+    def _rebuild_lookups(self):
+        # Reverse maps so events resolve to actions with a single dict lookup
+        self._key_actions = {}
+        for action, keys in self.key_bindings.items():
+            for key in keys:
+                self._key_actions.setdefault(key, []).append(action)
+        self._pad_actions = {}
+        for action, buttons in self.pad_bindings.items():
+            for button in buttons:
+                self._pad_actions.setdefault(button, []).append(action)
+
+    def rebind(self, action, keys=None, buttons=None):
+        """Replace the keys and/or gamepad buttons bound to an action"""
+        if keys is not None:
+            self.key_bindings[action] = tuple(keys)
+        if buttons is not None:
+            self.pad_bindings[action] = tuple(buttons)
+        self._rebuild_lookups()
+
+    def poll(self):
+        """Drain the event queue and sample every device once for this tick"""
+        pressed = set()
+        clicks = []
+        quit_requested = False
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                quit_requested = True
+            elif event.type == pygame.KEYDOWN:
+                pressed.update(self._key_actions.get(event.key, ()))
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                clicks.append(event.pos)
+            elif event.type == pygame.JOYBUTTONDOWN:
+                pressed.update(self._pad_actions.get(event.button, ()))
+            elif event.type == pygame.JOYDEVICEADDED:
+                joystick = pygame.joystick.Joystick(event.device_index)
+                self.joysticks[joystick.get_instance_id()] = joystick
+            elif event.type == pygame.JOYDEVICEREMOVED:
+                self.joysticks.pop(event.instance_id, None)
+
+        keys = pygame.key.get_pressed()
+        held = {action for action, bound in self.key_bindings.items()
+                if any(keys[key] for key in bound)}
+
+        for joystick in self.joysticks.values():
+            for action, buttons in self.pad_bindings.items():
+                if any(button < joystick.get_numbuttons() and joystick.get_button(button)
+                       for button in buttons):
+                    held.add(action)
+            # Left stick and d-pad both drive movement
+            axis_x = joystick.get_axis(0) if joystick.get_numaxes() > 1 else 0
+            axis_y = joystick.get_axis(1) if joystick.get_numaxes() > 1 else 0
+            hat_x, hat_y = joystick.get_hat(0) if joystick.get_numhats() > 0 else (0, 0)
+            if axis_x < -GAMEPAD_DEADZONE or hat_x < 0:
+                held.add('move_left')
+            if axis_x > GAMEPAD_DEADZONE or hat_x > 0:
+                held.add('move_right')
+            if axis_y < -GAMEPAD_DEADZONE or hat_y > 0:
+                held.add('move_up')
+            if axis_y > GAMEPAD_DEADZONE or hat_y < 0:
+                held.add('move_down')
+
+        # A tap shorter than one tick still counts as held for that tick
+        held |= pressed
+
+        self.state = InputState(
+            frozenset(held),
+            frozenset(pressed),
+            pygame.mouse.get_pos(),
+            pygame.mouse.get_pressed(),
+            tuple(clicks),
+            quit_requested
+        )
+        return self.state
+
+def source_stamp(path):
+    """Size and modification time used to tell whether a baked asset is stale"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def animation_key(folder, filename, frame_count, scale_factor):
+    return f'{folder}/{filename}:{frame_count}:{scale_factor}'
+
+def screen_image_key(filename, size):
+    return f'{filename}@{size[0]}x{size[1]}'
+
+class AssetBundle:
+    """Read-side of the baked bundle; frames are Surfaces over the mapped file, not copies"""
+    def __init__(self, path=ASSET_BUNDLE_PATH):
+        self.file = open(path, 'rb')
+        # Copy-on-write mapping: pages are shared with the OS cache until something writes
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, index_length = ASSET_BUNDLE_HEADER.unpack_from(self.data, 0)
+        if magic != ASSET_BUNDLE_MAGIC or version != ASSET_BUNDLE_VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a version {ASSET_BUNDLE_VERSION} asset bundle')
+        index_start = ASSET_BUNDLE_HEADER.size
+        self.index = json.loads(bytes(self.data[index_start:index_start + index_length]))
+        self.view = memoryview(self.data)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def is_fresh(self, entry):
+        try:
+            return all(source_stamp(path) == stamp for path, stamp in entry['sources'].items())
+        except OSError:
+            return False
+
+    def surface(self, offset, size):
+        start = self.index['data_start'] + offset
+        return pygame.image.frombuffer(self.view[start:start + size[0] * size[1] * 4],
+                                       size, BUNDLE_PIXEL_FORMAT)
+
+    def animation(self, key):
+        """Right/left frame lists for a baked animation, or None if missing or stale"""
+        entry = self.index['animations'].get(key)
+        if entry is None or not self.is_fresh(entry):
+            return None
+        size = tuple(entry['size'])
+        return ([self.surface(offset, size) for offset in entry['right']],
+                [self.surface(offset, size) for offset in entry['left']])
+
+    def image(self, key):
+        entry = self.index['images'].get(key)
+        if entry is None or not self.is_fresh(entry):
+            return None
+        return self.surface(entry['offset'], tuple(entry['size']))
+
+_asset_bundle = None
+_asset_bundle_checked = False
+
+def get_asset_bundle():
+    """Open the baked bundle on first use; None means every load falls back to PNGs"""
+    global _asset_bundle, _asset_bundle_checked
+    if not _asset_bundle_checked:
+        _asset_bundle_checked = True
+        try:
+            _asset_bundle = AssetBundle()
+        except (OSError, ValueError, struct.error):
+            _asset_bundle = None
+    return _asset_bundle
+
+def bake_asset_bundle(path=ASSET_BUNDLE_PATH):
+    """Slice, flip and scale every bundled asset and write the raw pixels to one file"""
+    index = {'animations': {}, 'images': {}}
+    chunks = []
+    offset = 0
+
+    def add_surface(surface):
+        nonlocal offset
+        pixels = pygame.image.tobytes(surface, BUNDLE_PIXEL_FORMAT)
+        chunks.append(pixels)
+        start = offset
+        offset += len(pixels)
+        return start
+
+    for folder, filename, frame_count in BUNDLED_ANIMATIONS:
+        source = os.path.join('assets', folder, filename)
+        frames_right, frames_left = slice_animation(folder, filename, frame_count, 1)
+        index['animations'][animation_key(folder, filename, frame_count, 1)] = {
+            'sources': {source: source_stamp(source)},
+            'size': list(frames_right[0].get_size()),
+            'right': [add_surface(frame) for frame in frames_right],
+            'left': [add_surface(frame) for frame in frames_left],
+        }
+
+    for filename in BUNDLED_SCREEN_IMAGES:
+        source = os.path.join('assets', filename)
+        size = (WINDOW_WIDTH, WINDOW_HEIGHT)
+        image = scale(pygame.image.load(source), size)
+        index['images'][screen_image_key(filename, size)] = {
+            'sources': {source: source_stamp(source)},
+            'size': list(size),
+            'offset': add_surface(image),
+        }
+
+    # Pixel data starts on a 16-byte boundary after the header and JSON index
+    index['data_start'] = 0
+    index_bytes = json.dumps(index).encode()
+    data_start = ASSET_BUNDLE_HEADER.size + len(index_bytes) + 32
+    data_start += -data_start % 16
+    index['data_start'] = data_start
+    index_bytes = json.dumps(index).encode()
+
+    with open(path, 'wb') as bundle_file:
+        bundle_file.write(ASSET_BUNDLE_HEADER.pack(ASSET_BUNDLE_MAGIC, ASSET_BUNDLE_VERSION, len(index_bytes)))
+        bundle_file.write(index_bytes)
+        bundle_file.write(b'\0' * (data_start - bundle_file.tell()))
+        for chunk in chunks:
+            bundle_file.write(chunk)
+    return path
+
+# Sliced animation frames per sheet, and a collision mask for every frame
+_animation_cache = {}
+FRAME_MASKS = {}
+
+def slice_animation(folder, filename, frame_count, scale_factor=1):
+    """Decode a horizontal sprite sheet and cut it into right- and left-facing frames"""
+    sheet = pygame.image.load(os.path.join('assets', folder, filename))
+    frame_width = sheet.get_width() // frame_count
+    frame_height = sheet.get_height()
+    frames_right = []
+    frames_left = []
+    for i in range(frame_count):
+        frame = pygame.Surface((frame_width, frame_height), pygame.SRCALPHA)
+        frame.blit(sheet, (0, 0), (i * frame_width, 0, frame_width, frame_height))
+        scaled_frame = scale(frame,
+                           (int(frame_width * scale_factor),
+                            int(frame_height * scale_factor)))
+        frames_right.append(scaled_frame)
+        frames_left.append(flip(scaled_frame, True, False))
+    return frames_right, frames_left
+
+def decode_animation(folder, filename, frame_count, scale_factor=1):
+    """Frames for a sheet and a mask per frame; touches no cache, so any thread may call it"""
+    bundle = get_asset_bundle()
+    frames = bundle.animation(animation_key(folder, filename, frame_count, scale_factor)) if bundle else None
+    if frames is None:
+        frames = slice_animation(folder, filename, frame_count, scale_factor)
+    # Build masks now so collisions never pay for them mid-game
+    masks = {frame: pygame.mask.from_surface(frame) for frame in frames[0] + frames[1]}
+    return frames, masks
+
+def install_animation(key, frames, masks):
+    """Cache decoded frames and their masks, unless the sheet is already loaded"""
+    if key not in _animation_cache:
+        FRAME_MASKS.update(masks)
+        _animation_cache[key] = frames
+    return _animation_cache[key]
+
+def load_animation(folder, filename, frame_count, scale_factor=1):
+    """Right- and left-facing frames for a sheet, loaded once per process"""
+    key = (folder, filename, frame_count, scale_factor)
+    frames = _animation_cache.get(key)
+    if frames is None:
+        frames = install_animation(key, *decode_animation(*key))
+    return frames
+
+def load_screen_image(filename, size=(WINDOW_WIDTH, WINDOW_HEIGHT)):
+    """Full-screen image scaled to size, from the bundle when it is up to date"""
+    bundle = get_asset_bundle()
+    image = bundle.image(screen_image_key(filename, size)) if bundle else None
+    if image is None:
+        image = scale(pygame.image.load(os.path.join('assets', filename)), size)
+    return image
+
+def segment_box_entry(x0, y0, dx, dy, left, top, right, bottom):
+    """Return the fraction (0-1) along a segment where it first enters a box, or None"""
+    t_enter, t_exit = 0.0, 1.0
+    for start, delta, low, high in ((x0, dx, left, right), (y0, dy, top, bottom)):
+        if delta == 0:
+            # Parallel to this slab: must already be inside it
+            if start < low or start > high:
+                return None
+            continue
+        t1 = (low - start) / delta
+        t2 = (high - start) / delta
+        if t1 > t2:
+            t1, t2 = t2, t1
+        t_enter = max(t_enter, t1)
+        t_exit = min(t_exit, t2)
+        if t_enter > t_exit:
+            return None
+    return t_enter
+
+def mask_contact_time(mover_mask, x0, y0, dx, dy, t_start, target_mask, target_pos):
+    """Step a mask along a path from t_start and return when it first touches the target mask"""
+    length = math.hypot(dx, dy)
+    step = 1.0 if length <= MASK_SWEEP_STEP else MASK_SWEEP_STEP / length
+    half_w = mover_mask.get_size()[0] / 2
+    half_h = mover_mask.get_size()[1] / 2
+    t = t_start
+    while True:
+        offset = (int(x0 + dx * t - half_w - target_pos[0]),
+                  int(y0 + dy * t - half_h - target_pos[1]))
+        if target_mask.overlap(mover_mask, offset):
+            return t
+        if t >= 1.0:
+            return None
+        t = min(1.0, t + step)
+
+class ColumnStore:
+    """Records stored column-wise in flat arrays; live records occupy indices [0, count)"""
+    def __init__(self, columns):
+        self._columns = tuple(columns)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def remove(self, i):
+        # Swap-remove: move the last record into the freed slot
+        last = self.count - 1
+        if i != last:
+            for column in self._columns:
+                column[i] = column[last]
+        self.count = last
+
+class ProjectileManager(ColumnStore):
+    """All live bullets, stored column-wise in flat arrays instead of one Sprite each"""
+    def __init__(self):
         # Load and scale the bullet image
-        self.original_image = pygame.image.load(os.path.join('assets', 'bullet.png'))
+        base_image = pygame.image.load(os.path.join('assets', 'bullet.png'))
         scale_factor = 0.2  # Keep visual size small
-        self.original_image = scale(self.original_image, 
-                                  (int(self.original_image.get_width() * scale_factor),
-                                   int(self.original_image.get_height() * scale_factor)))
-        
-        # Rotate image to match direction
+        base_image = scale(base_image,
+                           (int(base_image.get_width() * scale_factor),
+                            int(base_image.get_height() * scale_factor)))
+
+        # Rotate once per angle bucket; bullets only store their bucket index
+        self.images = []
+        self.masks = []
+        self.half_sizes = []
+        for bucket in range(PROJECTILE_ANGLE_BUCKETS):
+            image = pygame.transform.rotate(base_image, bucket * 360 / PROJECTILE_ANGLE_BUCKETS)
+            self.images.append(image)
+            self.masks.append(pygame.mask.from_surface(image))
+            self.half_sizes.append((image.get_width() / 2, image.get_height() / 2))
+
+        # One column per field; live bullets occupy indices [0, count)
+        self.x = array('d')
+        self.y = array('d')
+        self.prev_x = array('d')
+        self.prev_y = array('d')
+        self.dx = array('d')
+        self.dy = array('d')
+        self.speed = array('d')
+        self.spawn_time = array('q')
+        self.frame = array('H')
+        super().__init__((self.x, self.y, self.prev_x, self.prev_y, self.dx, self.dy,
+                          self.speed, self.spawn_time, self.frame))
+
+    def spawn(self, x, y, direction, current_time, speed=None):
+        if speed is None:
+            speed = PROJECTILE_SPEED
+        i = self.count
+        if i == len(self.x):
+            # Grow every column by one slot; freed slots are reused afterwards
+            for column in self._columns:
+                column.append(0)
         angle = math.degrees(math.atan2(-direction[1], direction[0]))
-        self.image = pygame.transform.rotate(self.original_image, angle)
-        
-        # Create rect and make hitbox bigger than visual
-        self.rect = self.image.get_rect()
-        self.rect.width *= 2  # Double the width of hitbox
-        self.rect.height *= 2  # Double the height of hitbox
-        
-        # Center the larger hitbox on the bullet
-        self.rect.center = (x, y)
-        
-        self.direction = direction
-        self.speed = speed
-        self.lifetime = 500  # milliseconds
-        self.spawn_time = pygame.time.get_ticks()
+        self.x[i] = self.prev_x[i] = x
+        self.y[i] = self.prev_y[i] = y
+        self.dx[i] = direction[0]
+        self.dy[i] = direction[1]
+        self.speed[i] = speed
+        self.spawn_time[i] = current_time
+        self.frame[i] = round(angle * PROJECTILE_ANGLE_BUCKETS / 360) % PROJECTILE_ANGLE_BUCKETS
+        self.count += 1
 
-    def update(self):
-        # Move in the specified direction
-        self.rect.x += self.direction[0] * self.speed
-        self.rect.y += self.direction[1] * self.speed
-        
-        # Delete if lifetime is over
-        if pygame.time.get_ticks() - self.spawn_time > self.lifetime:
-            self.kill()
+    def update(self, current_time):
+        """Move every bullet and drop expired ones in a single pass"""
+        x, y, prev_x, prev_y = self.x, self.y, self.prev_x, self.prev_y
+        dx, dy, speed, spawn_time = self.dx, self.dy, self.speed, self.spawn_time
+        i = 0
+        while i < self.count:
+            if current_time - spawn_time[i] > PROJECTILE_LIFETIME:
+                self.remove(i)
+                continue  # Slot i now holds a different bullet
+            prev_x[i] = x[i]
+            prev_y[i] = y[i]
+            x[i] += dx[i] * speed[i]
+            y[i] += dy[i] * speed[i]
+            i += 1
+
+    def draw(self, surface):
+        images, half_sizes = self.images, self.half_sizes
+        surface.blits([
+            (images[frame], (x - half_sizes[frame][0], y - half_sizes[frame][1]))
+            for x, y, frame in zip(self.x[:self.count], self.y[:self.count], self.frame[:self.count])
+        ], False)
+
+def particle_frames(color, radii):
+    """Shrinking, fading dots for simple particles"""
+    frames = []
+    for i, radius in enumerate(radii):
+        frame = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        alpha = 255 * (len(radii) - i) // len(radii)
+        pygame.draw.circle(frame, (*color, alpha), (radius, radius), radius)
+        frames.append(frame)
+    return frames
+
+class EffectManager(ColumnStore):
+    """Cosmetic particles and explosions in preallocated flat arrays, drawn with one blits call"""
+    # Effect sheets
+    BLAST = 0
+    BLOOD = 1
+    SPARK = 2
+    FLASH = 3
+
+    def __init__(self, capacity=None):
+        if capacity is None:
+            capacity = PARTICLE_CAPACITY
+        # Explosion.png opens with three frames of the grenade landing; keep the blast
+        explosion = load_animation('Soldier_1', 'Explosion.png', 9)[0][3:]
+        sheets = [
+            (explosion, (64, 110)),  # Anchor the blast at its base
+            (particle_frames((120, 0, 0), (4, 4, 3, 3, 2)), None),
+            (particle_frames((255, 210, 90), (3, 2, 2, 1)), None),
+            (particle_frames((255, 245, 200), (7, 5, 3)), None),
+        ]
+        # Per sheet, per frame: image and the offset from particle position to blit position
+        self.frames = [
+            [(image, anchor if anchor else (image.get_width() // 2, image.get_height() // 2)) for image in images]
+            for images, anchor in sheets
+        ]
+        self.random = random.Random()  # Effects never touch the gameplay RNG
+
+        # One column per field, allocated up front; live particles occupy [0, count)
+        self.x = array('d', bytes(8 * capacity))
+        self.y = array('d', bytes(8 * capacity))
+        self.vx = array('d', bytes(8 * capacity))
+        self.vy = array('d', bytes(8 * capacity))
+        self.spawn_time = array('q', bytes(8 * capacity))
+        self.lifetime = array('H', bytes(2 * capacity))
+        self.sheet = array('B', bytes(capacity))
+        self.frame = array('B', bytes(capacity))
+        super().__init__((self.x, self.y, self.vx, self.vy, self.spawn_time,
+                          self.lifetime, self.sheet, self.frame))
+        self.capacity = capacity
+
+    def emit(self, sheet, x, y, vx, vy, current_time, lifetime):
+        i = self.count
+        if i == self.capacity:
+            return  # Full: cosmetic, so just skip it
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.spawn_time[i] = current_time
+        self.lifetime[i] = lifetime
+        self.sheet[i] = sheet
+        self.frame[i] = 0
+        self.count += 1
+
+    def burst(self, sheet, x, y, count, speed, current_time, lifetime):
+        """Scatter particles in random directions at up to speed pixels per tick"""
+        uniform = self.random.uniform
+        for _ in range(count):
+            angle = uniform(0, math.tau)
+            velocity = uniform(0.3, 1.0) * speed
+            self.emit(sheet, x, y, math.cos(angle) * velocity, math.sin(angle) * velocity,
+                      current_time, int(lifetime * uniform(0.6, 1.0)))
+
+    def death_burst(self, x, y, current_time):
+        self.burst(self.BLOOD, x, y, 14, 4, current_time, 450)
+
+    def explosion(self, x, y, current_time):
+        self.emit(self.BLAST, x, y, 0, 0, current_time, 500)
+        self.burst(self.SPARK, x, y, 10, 6, current_time, 300)
+
+    def muzzle_flash(self, x, y, direction, current_time):
+        self.emit(self.FLASH, x, y, 0, 0, current_time, 60)
+        for _ in range(3):
+            spread = self.random.uniform(-0.5, 0.5)
+            self.emit(self.SPARK, x, y, (direction[0] - direction[1] * spread) * 5,
+                      (direction[1] + direction[0] * spread) * 5, current_time, 120)
+
+    def update(self, current_time):
+        """Age, move and animate every particle in a single pass"""
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        spawn_time, lifetime, sheet, frame = self.spawn_time, self.lifetime, self.sheet, self.frame
+        frame_counts = [len(frames) for frames in self.frames]
+        i = 0
+        while i < self.count:
+            age = current_time - spawn_time[i]
+            if age >= lifetime[i]:
+                self.remove(i)
+                continue  # Slot i now holds a different particle
+            x[i] += vx[i]
+            y[i] += vy[i]
+            vx[i] *= PARTICLE_DRAG
+            vy[i] *= PARTICLE_DRAG
+            frame[i] = age * frame_counts[sheet[i]] // lifetime[i]
+            i += 1
+
+    def blit_sequence(self):
+        """(image, position) for every live particle"""
+        frames = self.frames
+        count = self.count
+        blits = []
+        for x, y, sheet, frame in zip(self.x[:count], self.y[:count], self.sheet[:count], self.frame[:count]):
+            image, (anchor_x, anchor_y) = frames[sheet][frame]
+            blits.append((image, (x - anchor_x, y - anchor_y)))
+        return blits
+
+    def draw(self, surface):
+        surface.blits(self.blit_sequence(), False)
 
 class SingAttack(pygame.sprite.Sprite):
+    # Fixed attribute layout; pygame's Sprite base still carries a tiny dict for its groups
+    __slots__ = ('radius', 'image', 'rect', 'player', 'alpha')
+    
+    max_radius = 200  # Maximum radius
+    growth_speed = 5  # How fast the circle expands
+
     def __init__(self, player):
         super().__init__()
         # Create a circular attack instead of using image
         self.radius = 50  # Starting radius
-        self.max_radius = 200  # Maximum radius
-        self.growth_speed = 5  # How fast the circle expands
         self.image = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
         self.rect = self.image.get_rect()
         self.player = player
@@ -103,227 +717,138 @@ class SingAttack(pygame.sprite.Sprite):
         if self.radius >= self.max_radius:
             self.kill()
 
+def blit_player_image(surface, image, position, flashing):
+    if flashing:
+        # Tint a copy of the frame red while flashing
+        image = image.copy()
+        red_overlay = pygame.Surface(image.get_size()).convert_alpha()
+        red_overlay.fill((255, 0, 0, 128))  # Semi-transparent red
+        image.blit(red_overlay, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+    surface.blit(image, position)
+
 class Player(pygame.sprite.Sprite):
+    # Fixed attribute layout: only per-player state and pointers to the shared frames
+    __slots__ = (
+        'hurt_frames_right', 'hurt_frames_left', 'shot_frames_right', 'shot_frames_left',
+        'walk_frames_right', 'walk_frames_left', 'recharge_frames_right', 'recharge_frames_left',
+        'death_frames_right', 'death_frames_left',
+        'image', 'rect', 'input_state', 'current_frame', 'animation_timer', 'facing_left',
+        'experience', 'level', 'health', 'last_direction', 'last_sing',
+        'is_shooting', 'shot_timer', 'shot_frame', 'shot_animation_timer',
+        'is_hurt', 'hurt_frame', 'hurt_animation_timer', 'hurt_start_time', 'invulnerable',
+        'hurt_flash', 'current_flash', 'last_flash',
+        'recharge_frame', 'recharge_animation_timer', 'current_ammo', 'is_recharging', 'recharge_start_time',
+        'is_dead', 'death_frame', 'death_animation_timer', 'death_start_time',
+    )
+    
+    # Offset the sprite drawing position
+    sprite_offset_x = -40  # Adjust these values to move the sprite
+    sprite_offset_y = -80  # Negative values move up/left
+    
+    # Tuning values that never change during a run
+    animation_speed = 0.2
+    speed = 3  # Changed from 5 to 3 for slower movement
+    max_health = 100
+    sing_cooldown = 2000
+    shot_duration = 200  # How long to show shot animation (milliseconds)
+    shot_animation_speed = 0.3  # Adjust for faster/slower animation
+    hurt_animation_speed = 0.2
+    hurt_duration = 500  # milliseconds
+    invulnerable_duration = 1000  # 1 second of invulnerability after getting hurt
+    flash_duration = 100  # milliseconds for each flash
+    flash_count = 3  # number of flashes
+    recharge_animation_speed = 0.2
+    max_ammo = 10
+    recharge_duration = 1000  # 1 second to recharge
+    death_animation_speed = 0.15
+    death_duration = 2000  # 2 seconds
+
     def __init__(self):
         super().__init__()
-        # Define scale factor first
-        scale_factor = 1
-        
-        # Load sprite sheets
-        self.walk_sheet = pygame.image.load(os.path.join('assets', 'Soldier_1', 'Walk.png'))
-        self.shot_sheet = pygame.image.load(os.path.join('assets', 'Soldier_1', 'Shot_1.png'))
-        self.hurt_sheet = pygame.image.load(os.path.join('assets', 'Soldier_1', 'Hurt.png'))
-        
-        # Define frame dimensions for hurt animation
-        hurt_frame_width = self.hurt_sheet.get_width() // 3  # 3 frames for hurt
-        hurt_frame_height = self.hurt_sheet.get_height()
-        
-        # Create hurt frames
-        self.hurt_frames_right = []
-        self.hurt_frames_left = []
-        
-        # Extract and scale hurt frames
-        for i in range(3):  # 3 frames for hurt animation
-            frame = pygame.Surface((hurt_frame_width, hurt_frame_height), pygame.SRCALPHA)
-            frame.blit(self.hurt_sheet, (0, 0), (i * hurt_frame_width, 0, hurt_frame_width, hurt_frame_height))
-            scaled_frame = scale(frame, 
-                               (int(hurt_frame_width * scale_factor),
-                                int(hurt_frame_height * scale_factor)))
-            self.hurt_frames_right.append(scaled_frame)
-            self.hurt_frames_left.append(flip(scaled_frame, True, False))
-        
-        # Extract shot frames
-        self.shot_frames_right = []
-        self.shot_frames_left = []
-        
-        # Define shot frame dimensions
-        shot_frame_width = self.shot_sheet.get_width() // 4  # 4 frames in shot sheet
-        shot_frame_height = self.shot_sheet.get_height()
-        
-        # Scale factor
-        scale_factor = 1
-        
-        # Extract and scale shot frames
-        for i in range(4):  # 4 frames for shooting
-            # Extract frame
-            frame = pygame.Surface((shot_frame_width, shot_frame_height), pygame.SRCALPHA)
-            frame.blit(self.shot_sheet, (0, 0), (i * shot_frame_width, 0, shot_frame_width, shot_frame_height))
-            # Scale frame
-            scaled_frame = scale(frame, 
-                               (int(shot_frame_width * scale_factor),
-                                int(shot_frame_height * scale_factor)))
-            
-            # Store right-facing frame
-            self.shot_frames_right.append(scaled_frame)
-            # Store left-facing frame
-            self.shot_frames_left.append(flip(scaled_frame, True, False))
-        
-        # Load sprite sheets
-        self.walk_sheet = pygame.image.load(os.path.join('assets', 'Soldier_1', 'Walk.png'))
-        self.shot_image = pygame.image.load(os.path.join('assets', 'Soldier_1', 'Shot_1.png'))
-        
-        # Scale shot image
-        scale_factor = 1
-        self.shot_image = scale(self.shot_image, 
-                              (int(self.shot_image.get_width() * scale_factor),
-                               int(self.shot_image.get_height() * scale_factor)))
-        self.shot_image_left = flip(self.shot_image, True, False)
-        
-        # Define frame dimensions
-        frame_width = self.walk_sheet.get_width() // 7  # 7 frames in the sheet
-        frame_height = self.walk_sheet.get_height()
-        
-        scale_factor = 1  
-        
-        # Create two sets of frames: right-facing and left-facing
-        self.walk_frames_right = []
-        self.walk_frames_left = []
-        
-        for i in range(7):  # 7 frames
-            # Extract frame
-            frame = pygame.Surface((frame_width, frame_height), pygame.SRCALPHA)
-            frame.blit(self.walk_sheet, (0, 0), (i * frame_width, 0, frame_width, frame_height))
-            # Scale frame
-            scaled_frame = scale(frame, 
-                               (int(frame_width * scale_factor),
-                                int(frame_height * scale_factor)))
-            
-            # Store right-facing frame
-            self.walk_frames_right.append(scaled_frame)
-            # Store left-facing frame (flipped)
-            self.walk_frames_left.append(flip(scaled_frame, True, False))
-        
+        # Slice animations (shared with every other Player via the animation cache)
+        self.hurt_frames_right, self.hurt_frames_left = load_animation('Soldier_1', 'Hurt.png', 3)
+        self.shot_frames_right, self.shot_frames_left = load_animation('Soldier_1', 'Shot_1.png', 4)
+        self.walk_frames_right, self.walk_frames_left = load_animation('Soldier_1', 'Walk.png', 7)
+        self.recharge_frames_right, self.recharge_frames_left = load_animation('Soldier_1', 'Recharge.png', 13)
+        self.death_frames_right, self.death_frames_left = load_animation('Soldier_1', 'Dead.png', 4)
+        
+        # Create a collision box with 1/8 of the frame size
+        frame_width, frame_height = self.walk_frames_right[0].get_size()
+        self.rect = pygame.Rect(0, 0, frame_width // 8, frame_height // 8)
+        
+        self.reset()
+
+    def reset(self):
+        """Put the player back to its starting state without reloading anything"""
         # Animation variables
         self.current_frame = 0
-        self.animation_speed = 0.2
         self.animation_timer = 0
         
-        # Set initial image and rect
+        # Set initial image and center the collision box
         self.image = self.walk_frames_right[0]
-        self.rect = self.image.get_rect()
-        
-        # Create a collision box with half width
-        self.rect.width = self.rect.width // 8
-        self.rect.height = self.rect.height // 8
-        
-        # Center the collision box
         self.rect.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
         
-        # Offset the sprite drawing position
-        self.sprite_offset_x = -40  # Adjust these values to move the sprite
-        self.sprite_offset_y = -80  # Negative values move up/left
-        
         # Movement attributes
-        self.speed = 3  # Changed from 5 to 3 for slower movement
         self.facing_left = False
         
         # Other attributes
         self.experience = 0
         self.level = 1
-        self.health = 100
-        self.max_health = 100
+        self.health = self.max_health
         self.last_direction = (1, 0)
-        self.sing_cooldown = 2000
         self.last_sing = 0
 
         self.is_shooting = False
-        self.shot_duration = 200  # How long to show shot animation (milliseconds)
         self.shot_timer = 0
 
-        # Add shooting animation variables
+        # Shooting animation variables
         self.shot_frame = 0
-        self.shot_animation_speed = 0.3  # Adjust for faster/slower animation
         self.shot_animation_timer = 0
 
-        # Add hurt animation variables
+        # Hurt animation variables
         self.is_hurt = False
         self.hurt_frame = 0
-        self.hurt_animation_speed = 0.2
         self.hurt_animation_timer = 0
-        self.hurt_duration = 500  # milliseconds
         self.hurt_start_time = 0
         self.invulnerable = False
-        self.invulnerable_duration = 1000  # 1 second of invulnerability after getting hurt
 
-        # Add hurt effect variables
+        # Hurt effect variables
         self.hurt_flash = False
-        self.flash_duration = 100  # milliseconds for each flash
-        self.flash_count = 3  # number of flashes
         self.current_flash = 0
         self.last_flash = 0
 
-        # Load recharge animation
-        self.recharge_sheet = pygame.image.load(os.path.join('assets', 'Soldier_1', 'Recharge.png'))
-        recharge_frame_width = self.recharge_sheet.get_width() // 13  # 13 frames
-        recharge_frame_height = self.recharge_sheet.get_height()
-        
-        # Create recharge frames
-        self.recharge_frames_right = []
-        self.recharge_frames_left = []
-        
-        for i in range(13):  # 13 frames for recharge animation
-            frame = pygame.Surface((recharge_frame_width, recharge_frame_height), pygame.SRCALPHA)
-            frame.blit(self.recharge_sheet, (0, 0), 
-                      (i * recharge_frame_width, 0, recharge_frame_width, recharge_frame_height))
-            scaled_frame = scale(frame, 
-                               (int(recharge_frame_width * scale_factor),
-                                int(recharge_frame_height * scale_factor)))
-            self.recharge_frames_right.append(scaled_frame)
-            self.recharge_frames_left.append(flip(scaled_frame, True, False))
-        
-        # Add recharge animation variables
+        # Recharge animation variables
         self.recharge_frame = 0
-        self.recharge_animation_speed = 0.2
         self.recharge_animation_timer = 0
 
-        # Add ammo variables
-        self.max_ammo = 10
+        # Ammo variables
         self.current_ammo = self.max_ammo
         self.is_recharging = False
-        self.recharge_duration = 1000  # 1 second to recharge
         self.recharge_start_time = 0
 
-        # Load death animation
-        self.death_sheet = pygame.image.load(os.path.join('assets', 'Soldier_1', 'Dead.png'))
-        death_frame_width = self.death_sheet.get_width() // 4  # 4 frames for death
-        death_frame_height = self.death_sheet.get_height()
-        
-        # Create death frames
-        self.death_frames_right = []
-        self.death_frames_left = []
-        
-        for i in range(4):  # 4 frames for death animation
-            frame = pygame.Surface((death_frame_width, death_frame_height), pygame.SRCALPHA)
-            frame.blit(self.death_sheet, (0, 0), 
-                      (i * death_frame_width, 0, death_frame_width, death_frame_height))
-            scaled_frame = scale(frame, 
-                               (int(death_frame_width * scale_factor),
-                                int(death_frame_height * scale_factor)))
-            self.death_frames_right.append(scaled_frame)
-            self.death_frames_left.append(flip(scaled_frame, True, False))
-        
-        # Add death animation variables
+        # Death animation variables
         self.is_dead = False
         self.death_frame = 0
-        self.death_animation_speed = 0.15
         self.death_animation_timer = 0
         self.death_start_time = 0
-        self.death_duration = 2000  # 2 seconds
+
+        # Input snapshot for the current tick, set by Game before update()
+        self.input_state = EMPTY_INPUT
 
     def take_damage(self):
         if not self.invulnerable:
             self.is_hurt = True
             self.hurt_frame = 0
             self.hurt_animation_timer = 0
-            self.hurt_start_time = pygame.time.get_ticks()
+            self.hurt_start_time = get_ticks()
             self.invulnerable = True
             # Initialize flash effect
             self.hurt_flash = True
             self.current_flash = 0
-            self.last_flash = pygame.time.get_ticks()
+            self.last_flash = get_ticks()
 
     def update(self):
-        current_time = pygame.time.get_ticks()
+        current_time = get_ticks()
         
         # Handle death animation
         if self.is_dead:
@@ -370,12 +895,12 @@ class Player(pygame.sprite.Sprite):
             # Skip rest of update if hurt
             return
 
-        keys = pygame.key.get_pressed()
+        controls = self.input_state
         dx, dy = 0, 0
         moving = False
         
         # Check for shooting
-        if keys[pygame.K_SPACE]:
+        if controls.is_held('fire'):
             self.is_shooting = True
             
         # Update shooting animation
@@ -389,17 +914,17 @@ class Player(pygame.sprite.Sprite):
                     self.is_shooting = False
         
         # Movement keys
-        if keys[pygame.K_w]:
+        if controls.is_held('move_up'):
             dy -= self.speed
             moving = True
-        if keys[pygame.K_s]:
+        if controls.is_held('move_down'):
             dy += self.speed
             moving = True
-        if keys[pygame.K_a]:
+        if controls.is_held('move_left'):
             dx -= self.speed
             moving = True
             self.facing_left = True
-        if keys[pygame.K_d]:
+        if controls.is_held('move_right'):
             dx += self.speed
             moving = True
             self.facing_left = False
@@ -440,7 +965,7 @@ class Player(pygame.sprite.Sprite):
                                  dy/total if total != 0 else 0)
 
         # Keep player on screen
-        self.rect.clamp_ip(pygame.display.get_surface().get_rect())
+        self.rect.clamp_ip(pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT))
 
         # Handle recharging
         if self.is_recharging:
@@ -463,36 +988,43 @@ class Player(pygame.sprite.Sprite):
                 self.recharge_frame = 0
             return  # Skip other animations while recharging
 
+    def refresh_image(self):
+        """Pick the frame matching the current state, e.g. after loading a snapshot"""
+        if self.is_dead:
+            frames, index = self.death_frames_left if self.facing_left else self.death_frames_right, self.death_frame
+        elif self.is_hurt:
+            frames, index = self.hurt_frames_left if self.facing_left else self.hurt_frames_right, self.hurt_frame
+        elif self.is_recharging:
+            frames, index = self.recharge_frames_left if self.facing_left else self.recharge_frames_right, self.recharge_frame
+        elif self.is_shooting:
+            frames, index = self.shot_frames_left if self.facing_left else self.shot_frames_right, self.shot_frame
+        else:
+            frames, index = self.walk_frames_left if self.facing_left else self.walk_frames_right, self.current_frame
+        self.image = frames[index % len(frames)]
+
     def sing_attack(self, game):
-        current_time = pygame.time.get_ticks()
+        current_time = get_ticks()
         if current_time - self.last_sing >= self.sing_cooldown:
             sing = SingAttack(self)
             game.all_sprites.add(sing)
             game.sing_attacks.add(sing)
             self.last_sing = current_time
 
+    def is_flashing(self):
+        return self.hurt_flash and (self.current_flash % 2 == 0)
+
     def draw(self, surface):
-        # Create a copy of the current image for tinting
-        current_image = self.image.copy()
-        
-        # If flashing and on a flash cycle, tint the image red
-        if self.hurt_flash and (self.current_flash % 2 == 0):
-            # Create a red overlay
-            red_overlay = pygame.Surface(current_image.get_size()).convert_alpha()
-            red_overlay.fill((255, 0, 0, 128))  # Semi-transparent red
-            current_image.blit(red_overlay, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-        
         # Draw the sprite at an offset from the collision box
         sprite_pos = (self.rect.x + self.sprite_offset_x, 
                      self.rect.y + self.sprite_offset_y)
-        surface.blit(current_image, sprite_pos)
+        blit_player_image(surface, self.image, sprite_pos, self.is_flashing())
 
     def shoot(self):
         if self.current_ammo > 0:
             self.current_ammo -= 1
             if self.current_ammo <= 0:
                 self.is_recharging = True
-                self.recharge_start_time = pygame.time.get_ticks()
+                self.recharge_start_time = get_ticks()
             return True
         return False
 
@@ -501,99 +1033,88 @@ class Player(pygame.sprite.Sprite):
             self.is_dead = True
             self.death_frame = 0
             self.death_animation_timer = 0
-            self.death_start_time = pygame.time.get_ticks()
+            self.death_start_time = get_ticks()
+
+def random_spawn_position():
+    """Pick a point just outside one of the four screen edges"""
+    side = random.randint(0, 3)
+    if side == 0:  # Top
+        return random.randint(0, WINDOW_WIDTH), -50
+    elif side == 1:  # Right
+        return WINDOW_WIDTH + 50, random.randint(0, WINDOW_HEIGHT)
+    elif side == 2:  # Bottom
+        return random.randint(0, WINDOW_WIDTH), WINDOW_HEIGHT + 50
+    else:  # Left
+        return -50, random.randint(0, WINDOW_HEIGHT)
+
+# Per-type frames and tuning, shared by every zombie of the type
+ZombieKind = namedtuple('ZombieKind', 'id name speed_scale hitbox attack_range sprite_offset '
+                                      'walk_right walk_left attack_right attack_left')
+_zombie_kinds = {}
+
+def get_zombie_kind(name):
+    """Load a zombie type's frames on first use and return the shared ZombieKind"""
+    kind = _zombie_kinds.get(name)
+    if kind is None:
+        zombie_type = ZOMBIE_TYPES[name]
+        walk_right, walk_left = load_animation(zombie_type.folder, *zombie_type.walk)
+        attack_right, attack_left = load_animation(zombie_type.folder, *zombie_type.attack)
+        kind = _zombie_kinds[name] = ZombieKind(
+            list(ZOMBIE_TYPES).index(name), name, zombie_type.speed_scale, zombie_type.hitbox,
+            zombie_type.attack_range, zombie_type.sprite_offset,
+            walk_right, walk_left, attack_right, attack_left
+        )
+    return kind
+
+def zombie_kind_by_id(kind_id):
+    return get_zombie_kind(list(ZOMBIE_TYPES)[kind_id])
 
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self, player, level):
+    # Fixed attribute layout: only per-zombie state and a pointer to the shared kind
+    __slots__ = (
+        'kind', 'image', 'rect', 'current_frame', 'animation_timer', 'facing_left', 'is_attacking',
+        'attack_frame', 'player', 'speed', 'attack_range', 'sprite_offset_x', 'sprite_offset_y',
+    )
+    
+    animation_speed = 0.15
+
+    def __init__(self, player, level, position=None, kind=None):
         super().__init__()
-        # Load sprite sheets
-        self.walk_sheet = pygame.image.load(os.path.join('assets', 'Zombie Man', 'Walk.png'))
-        self.attack_sheet = pygame.image.load(os.path.join('assets', 'Zombie Man', 'Attack_1.png'))
-        
-        # Define frame dimensions
-        self.walk_frame_width = self.walk_sheet.get_width() // 8
-        self.walk_frame_height = self.walk_sheet.get_height()
-        self.attack_frame_width = self.attack_sheet.get_width() // 5  # 5 frames for attack
-        self.attack_frame_height = self.attack_sheet.get_height()
-        
-        # Scale factor
-        scale_factor = 1
-        
-        # Create walk frames
-        self.walk_frames_right = []
-        self.walk_frames_left = []
-        
-        for i in range(8):
-            frame = pygame.Surface((self.walk_frame_width, self.walk_frame_height), pygame.SRCALPHA)
-            frame.blit(self.walk_sheet, (0, 0), (i * self.walk_frame_width, 0, self.walk_frame_width, self.walk_frame_height))
-            scaled_frame = scale(frame, 
-                               (int(self.walk_frame_width * scale_factor),
-                                int(self.walk_frame_height * scale_factor)))
-            self.walk_frames_right.append(scaled_frame)
-            self.walk_frames_left.append(flip(scaled_frame, True, False))
-        
-        # Create attack frames
-        self.attack_frames_right = []
-        self.attack_frames_left = []
-        
-        for i in range(5):  # 5 frames for attack animation
-            frame = pygame.Surface((self.attack_frame_width, self.attack_frame_height), pygame.SRCALPHA)
-            frame.blit(self.attack_sheet, (0, 0), (i * self.attack_frame_width, 0, self.attack_frame_width, self.attack_frame_height))
-            scaled_frame = scale(frame, 
-                               (int(self.attack_frame_width * scale_factor),
-                                int(self.attack_frame_height * scale_factor)))
-            self.attack_frames_right.append(scaled_frame)
-            self.attack_frames_left.append(flip(scaled_frame, True, False))
-        
-        # Set initial image and create rect
-        self.image = self.walk_frames_right[0]
-        self.rect = self.image.get_rect()
-        
-        # Now modify the collision box size
-        self.rect.width = self.rect.width // 8
-        self.rect.height = self.rect.height // 4
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(player, level, position, kind)
+
+    def reset(self, player, level, position=None, kind=None):
+        """Reinitialize a new or pooled zombie for another spawn, of any type"""
+        # Changing type only swaps the pointer to the shared kind
+        if kind is None:
+            kind = get_zombie_kind(DEFAULT_ZOMBIE_TYPE)
+        self.kind = kind
+        self.rect.size = kind.hitbox
+        self.attack_range = kind.attack_range
+        self.sprite_offset_x, self.sprite_offset_y = kind.sprite_offset
+        self.image = kind.walk_right[0]
         
         # Animation variables
         self.current_frame = 0
-        self.animation_speed = 0.15
         self.animation_timer = 0
         self.facing_left = False
         self.is_attacking = False
-        
-        # Separate ranges for animation and damage (reduced by 1/3)
-        self.attack_animation_distance = 50  # Reduced from 50 to ~33
-        self.attack_damage_distance = 50     # Reduced from 100 to ~66
-        
         self.attack_frame = 0
         
-        # Adjust sprite offset for better positioning
-        self.sprite_offset_x = -25
-        self.sprite_offset_y = -60
-        
         self.player = player
         
-        # Set speed based on level
+        # Set speed based on level, scaled for the type
         if level == 1:
-            self.speed = LEVEL_1_SPEED
+            self.speed = LEVEL_1_SPEED * kind.speed_scale
         elif level == 2:
-            self.speed = LEVEL_2_SPEED
+            self.speed = LEVEL_2_SPEED * kind.speed_scale
         else:
-            self.speed = LEVEL_3_SPEED
+            self.speed = LEVEL_3_SPEED * kind.speed_scale
         
         # Spawn enemy outside the screen
-        side = random.randint(0, 3)
-        if side == 0:  # Top
-            self.rect.x = random.randint(0, WINDOW_WIDTH)
-            self.rect.y = -50
-        elif side == 1:  # Right
-            self.rect.x = WINDOW_WIDTH + 50
-            self.rect.y = random.randint(0, WINDOW_HEIGHT)
-        elif side == 2:  # Bottom
-            self.rect.x = random.randint(0, WINDOW_WIDTH)
-            self.rect.y = WINDOW_HEIGHT + 50
-        else:  # Left
-            self.rect.x = -50
-            self.rect.y = random.randint(0, WINDOW_HEIGHT)
+        if position is None:
+            position = random_spawn_position()
+        self.rect.x, self.rect.y = position
 
     def update(self):
         # Calculate distance to player
@@ -605,7 +1126,7 @@ class Enemy(pygame.sprite.Sprite):
         new_facing_left = dx < 0
         
         # Check if close enough to attack
-        self.is_attacking = dist <= self.attack_animation_distance
+        self.is_attacking = dist <= self.attack_range
         
         if dist != 0:
             # Move towards player if not in attack animation range
@@ -617,59 +1138,478 @@ class Enemy(pygame.sprite.Sprite):
             self.animation_timer += self.animation_speed
             if self.animation_timer >= 1:
                 self.animation_timer = 0
+                kind = self.kind
                 if self.is_attacking:
                     # Use attack animation
-                    self.current_frame = (self.current_frame + 1) % len(self.attack_frames_right)
+                    self.current_frame = (self.current_frame + 1) % len(kind.attack_right)
                     if new_facing_left:
-                        self.image = self.attack_frames_left[self.current_frame]
+                        self.image = kind.attack_left[self.current_frame]
                     else:
-                        self.image = self.attack_frames_right[self.current_frame]
+                        self.image = kind.attack_right[self.current_frame]
                 else:
                     # Reset attack frame when not attacking
                     self.attack_frame = 0
                     # Use walk animation
-                    self.current_frame = (self.current_frame + 1) % len(self.walk_frames_right)
+                    self.current_frame = (self.current_frame + 1) % len(kind.walk_right)
                     if new_facing_left:
-                        self.image = self.walk_frames_left[self.current_frame]
+                        self.image = kind.walk_left[self.current_frame]
                     else:
-                        self.image = self.walk_frames_right[self.current_frame]
+                        self.image = kind.walk_right[self.current_frame]
             
             self.facing_left = new_facing_left
 
+    def refresh_image(self):
+        """Pick the frame matching the current state, e.g. after loading a snapshot"""
+        kind = self.kind
+        if self.is_attacking:
+            frames = kind.attack_left if self.facing_left else kind.attack_right
+        else:
+            frames = kind.walk_left if self.facing_left else kind.walk_right
+        self.image = frames[self.current_frame % len(frames)]
+
+    def sprite_rect(self):
+        """Screen area covered by the drawn sprite (not the collision box)"""
+        return pygame.Rect(self.rect.x + self.sprite_offset_x,
+                           self.rect.y + self.sprite_offset_y,
+                           self.image.get_width(), self.image.get_height())
+
     def draw(self, surface):
         # Draw the sprite at an offset from the collision box
         sprite_pos = (self.rect.x + self.sprite_offset_x, 
                      self.rect.y + self.sprite_offset_y)
         surface.blit(self.image, sprite_pos)
 
-class Game:
+class SpawnScheduler:
+    """Queues a level's spawns and builds them a few at a time within a frame budget"""
+    def __init__(self, budget_ms=None):
+        self.budget_ms = SPAWN_BUDGET_MS if budget_ms is None else budget_ms
+        self.level = 1
+        self.plan = LEVEL_SPAWN_PLANS[1]
+        self.spawns = deque()  # Pre-generated (position, kind) for the level
+        self.pending = 0  # Spawns that are due but not built yet
+        self.scheduled = 0
+        self.spawned = 0
+        self.next_burst_time = 0
+        self.last_frame_ms = 0.0
+
+    def start_level(self, level, current_time, plan=None):
+        self.level = level
+        self.plan = plan if plan is not None else LEVEL_SPAWN_PLANS[min(level, 3)]
+        self.pending = 0
+        self.scheduled = 0
+        self.spawned = 0
+        self.next_burst_time = current_time  # First burst goes out immediately
+        # Pick every spawn point and zombie type for the level up front; this also
+        # loads the level's zombie frames here rather than mid-wave
+        mix = self.plan.get('mix', {DEFAULT_ZOMBIE_TYPE: 1})
+        kinds = random.choices([get_zombie_kind(name) for name in mix], list(mix.values()), k=self.plan['total'])
+        self.spawns = deque((random_spawn_position(), kind) for kind in kinds)
+
+    @property
+    def backlog(self):
+        return self.pending
+
+    def report(self):
+        return {
+            'level': self.level,
+            'pending': self.pending,
+            'spawned': self.spawned,
+            'remaining': self.plan['total'] - self.spawned,
+            'last_frame_ms': self.last_frame_ms,
+        }
+
+    def update(self, game, current_time):
+        # Queue the next burst once its delay has passed
+        if self.scheduled < self.plan['total'] and current_time >= self.next_burst_time:
+            count = min(self.plan['burst'], self.plan['total'] - self.scheduled)
+            self.pending += count
+            self.scheduled += count
+            self.next_burst_time = current_time + self.plan['delay']
+
+        # Build queued enemies until the budget runs out (always at least one)
+        start = time.perf_counter()
+        while self.pending:
+            position, kind = self.spawns.popleft() if self.spawns else (random_spawn_position(), None)
+            game.acquire_enemy(self.level, position, kind)
+            self.pending -= 1
+            self.spawned += 1
+            if (time.perf_counter() - start) * 1000 >= self.budget_ms:
+                break
+        self.last_frame_ms = (time.perf_counter() - start) * 1000
+
+# Immutable per-tick output of the simulation, everything the renderer needs
+HudValues = namedtuple('HudValues', 'health max_health level enemies_killed enemies_for_level ammo max_ammo recharging')
+DrawState = namedtuple('DrawState', 'time level effects bullets enemies particles player player_flashing hud transitioning game_over')
+
+class DrawBuffer:
+    """Double buffer holding the two most recent DrawStates for interpolation"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.previous = None
+        self.latest = None
+
+    def publish(self, state):
+        with self.lock:
+            self.previous, self.latest = self.latest, state
+
+    def read(self):
+        with self.lock:
+            return self.previous, self.latest
+
+    def clear(self):
+        with self.lock:
+            self.previous = self.latest = None
+
+class InputMailbox:
+    """Hands input from the event thread to the simulation without losing key presses"""
     def __init__(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.lock = threading.Lock()
+        self.state = EMPTY_INPUT
+        self.pressed = set()
+
+    def post(self, state):
+        with self.lock:
+            self.state = state
+            self.pressed |= state.pressed
+
+    def take(self):
+        """Latest held keys plus every press since the last take"""
+        with self.lock:
+            pressed = frozenset(self.pressed)
+            self.pressed.clear()
+            return self.state._replace(held=self.state.held | pressed, pressed=pressed, clicks=())
+
+def lerp_position(start, end, alpha):
+    # Large jumps are teleports (spawns, pooled reuse), so don't slide across them
+    if start is None or abs(end[0] - start[0]) + abs(end[1] - start[1]) > 64:
+        return end
+    return (start[0] + (end[0] - start[0]) * alpha, start[1] + (end[1] - start[1]) * alpha)
+
+GCPause = namedtuple('GCPause', 'frame context generation duration_ms collected uncollectable')
+
+# The collector is process-wide: remember its thresholds from before any Game
+# touched them, and freeze startup objects at most once per process
+_GC_DEFAULT_THRESHOLD = gc.get_threshold()
+_gc_frozen = False
+
+class GCController:
+    """Keeps full collections out of gameplay frames and records every GC pause"""
+    def __init__(self, managed=None):
+        self.managed = GC_MANAGED if managed is None else managed
+        self.default_threshold = _GC_DEFAULT_THRESHOLD
+        self.pauses = deque(maxlen=GC_PAUSE_HISTORY)
+        self.context = 'startup'  # What the game was doing, for attributing pauses
+        self.frame = 0  # Bumped once per simulation tick
+        self._started = None
+        gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            self._started = time.perf_counter()
+        elif self._started is not None:
+            self.pauses.append(GCPause(
+                self.frame, self.context, info['generation'],
+                (time.perf_counter() - self._started) * 1000,
+                info['collected'], info['uncollectable']
+            ))
+            self._started = None
+
+    def close(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        gc.set_threshold(*self.default_threshold)
+
+    def collect(self, context):
+        """Full collection at a moment where a pause can't be seen"""
+        self.context = context
+        gc.collect()
+
+    def enter_gameplay(self):
+        """Collect, freeze what has survived startup, then defer gen-2 until the next break"""
+        global _gc_frozen
+        self.collect('restart')
+        if self.managed:
+            if not _gc_frozen:
+                # Frames, masks, fonts and the pools are live for the whole session
+                gc.freeze()
+                _gc_frozen = True
+            gc.set_threshold(self.default_threshold[0], self.default_threshold[1], GC_GAMEPLAY_GEN2_THRESHOLD)
+        self.context = 'gameplay'
+
+    def enter_break(self, context):
+        """Level transition, game over or menu: catch up on deferred garbage now"""
+        self.collect(context)
+        self.context = context
+
+    def resume(self):
+        self.context = 'gameplay'
+
+    def report(self):
+        """Pause totals per (context, generation)"""
+        totals = {}
+        for pause in self.pauses:
+            count, total, worst = totals.get((pause.context, pause.generation), (0, 0.0, 0.0))
+            totals[pause.context, pause.generation] = (count + 1, total + pause.duration_ms, max(worst, pause.duration_ms))
+        return totals
+
+class TelemetryRing:
+    """Fixed-size single-producer/single-consumer queue without locks.
+
+    Only the game thread moves head and only the writer moves tail; each is a
+    single attribute store, which the GIL makes atomic.
+    """
+    def __init__(self, capacity=TELEMETRY_RING_CAPACITY):
+        self.slots = [None] * capacity
+        self.capacity = capacity
+        self.head = 0  # Next slot to write
+        self.tail = 0  # Next slot to read
+        self.dropped = 0
+
+    def push(self, item):
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.dropped += 1  # Writer is behind: lose the sample rather than stall the frame
+            return False
+        self.slots[head % self.capacity] = item
+        self.head = head + 1
+        return True
+
+    def drain(self):
+        head = self.head
+        slots, capacity = self.slots, self.capacity
+        items = [slots[i % capacity] for i in range(self.tail, head)]
+        self.tail = head
+        return items
+
+class TelemetryWriter:
+    """Records gameplay and performance events without doing I/O on the game thread"""
+    def __init__(self, directory, file_format='jsonl', capacity=TELEMETRY_RING_CAPACITY,
+                 rotate_bytes=TELEMETRY_ROTATE_BYTES, flush_interval=TELEMETRY_FLUSH_INTERVAL, background=True):
+        if file_format not in ('jsonl', 'binary'):
+            raise ValueError(f"unknown telemetry format '{file_format}'")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.file_format = file_format
+        self.rotate_bytes = rotate_bytes
+        self.flush_interval = flush_interval
+        self.ring = TelemetryRing(capacity)
+        self.started = time.time()
+        self.session = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))}-{os.getpid()}"
+        self.paths = []
+        self._codes = {name: code for code, name in enumerate(TELEMETRY_EVENTS)}
+        self._file = None
+        self._file_bytes = 0
+        self._reported_drops = 0
+        # Without the background thread, the owner calls flush() itself (see Game.flush_telemetry)
+        self._stop = threading.Event()
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+            self._thread.start()
+
+    def record(self, event, *values):
+        """Queue an event; never blocks and never touches the disk"""
+        self.ring.push((event, get_ticks(), values))
+
+    def close(self):
+        """Stop the writer after it has written everything queued so far"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        else:
+            self._finish()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+        self._finish()
+
+    def _finish(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+
+    def flush(self):
+        """Write out everything queued; one caller at a time"""
+        events = self.ring.drain()
+        dropped = self.ring.dropped
+        if dropped != self._reported_drops:
+            events.append(('dropped', get_ticks(), (dropped - self._reported_drops,)))
+            self._reported_drops = dropped
+        if not events:
+            return
+        data = self._encode(events)
+        if self._file is None or self._file_bytes + len(data) > self.rotate_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._file_bytes += len(data)
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        extension = 'jsonl' if self.file_format == 'jsonl' else 'bin'
+        path = os.path.join(self.directory, f'session-{self.session}-{len(self.paths):03d}.{extension}')
+        self.paths.append(path)
+        self._file = open(path, 'wb')
+        # Every file starts with the session start so it can be read on its own
+        if self.file_format == 'jsonl':
+            header = (json.dumps({'event': 'session', 'started': self.started,
+                                  'version': TELEMETRY_VERSION}) + '\n').encode()
+        else:
+            header = TELEMETRY_HEADER.pack(TELEMETRY_MAGIC, TELEMETRY_VERSION, self.started)
+        self._file.write(header)
+        self._file_bytes = len(header)
+
+    def _encode(self, events):
+        if self.file_format == 'jsonl':
+            lines = []
+            for event, ticks, values in events:
+                record = {'event': event, 't': ticks}
+                record.update((name, kind(value)) for (name, kind), value in zip(TELEMETRY_EVENTS[event], values))
+                lines.append(json.dumps(record))
+            return ('\n'.join(lines) + '\n').encode()
+        out = bytearray()
+        for event, ticks, values in events:
+            out += TELEMETRY_RECORD.pack(self._codes[event], ticks, *values, *(0,) * (3 - len(values)))
+        return bytes(out)
+
+def read_telemetry(path):
+    """Decode one telemetry file (either format) back into event dicts"""
+    with open(path, 'rb') as telemetry_file:
+        data = telemetry_file.read()
+    if not data.startswith(TELEMETRY_MAGIC):
+        return [json.loads(line) for line in data.decode().splitlines()[1:]]
+    names = list(TELEMETRY_EVENTS)
+    events = []
+    for code, ticks, *values in TELEMETRY_RECORD.iter_unpack(data[TELEMETRY_HEADER.size:]):
+        event = {'event': names[code], 't': ticks}
+        for (name, kind), value in zip(TELEMETRY_EVENTS[names[code]], values):
+            event[name] = kind(round(value)) if kind is not float else value
+        events.append(event)
+    return events
+
+def append_score(path, record):
+    with open(path, 'a') as scores_file:
+        scores_file.write(json.dumps(record) + '\n')
+
+class SlowCallbackGuard(logging.Handler):
+    """Reports every callback or coroutine step that held the event loop past the frame budget"""
+    def __init__(self, loop, budget_ms=ASYNC_SLOW_MS):
+        super().__init__(logging.WARNING)
+        self.reports = []  # (what, ms)
+        # asyncio's debug mode times every step and logs the slow ones
+        loop.set_debug(True)
+        loop.slow_callback_duration = budget_ms / 1000
+        logging.getLogger('asyncio').addHandler(self)
+
+    def emit(self, record):
+        if record.msg.startswith('Executing') and len(record.args) == 2:
+            what, seconds = record.args
+            self.reports.append((what, seconds * 1000))
+            print(f"Slow: {what} held the loop for {seconds * 1000:.1f} ms", file=sys.stderr)
+        else:
+            print(self.format(record), file=sys.stderr)
+
+    def close(self):
+        logging.getLogger('asyncio').removeHandler(self)
+        super().close()
+
+class StartupTimer:
+    """Milliseconds spent in each startup phase, in order"""
+    def __init__(self):
+        self.phases = {}
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = (now - self._last) * 1000
+        self._last = now
+
+class Renderer:
+    """Fixed logical canvas, scaled into the window (letterboxed) in one pass per frame"""
+    def __init__(self, window_size=None):
+        self.window = pygame.display.set_mode(window_size or (WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE)
+        self.layout()
+
+    def layout(self):
+        """Fit the canvas to the current window size"""
+        self.window_size = self.window.get_size()
+        window_width, window_height = self.window_size
+        self.scale = min(window_width / WINDOW_WIDTH, window_height / WINDOW_HEIGHT)
+        size = (max(1, round(WINDOW_WIDTH * self.scale)), max(1, round(WINDOW_HEIGHT * self.scale)))
+        self.viewport = pygame.Rect(((window_width - size[0]) // 2, (window_height - size[1]) // 2), size)
+        self.window.fill(BLACK)  # Letterbox bars
+        self.target = self.window.subsurface(self.viewport)
+        if size == (WINDOW_WIDTH, WINDOW_HEIGHT):
+            # 1:1: draw straight into the window, no scaling pass at all
+            self.canvas = self.target
+        else:
+            self.canvas = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+
+    def present(self):
+        if self.window.get_size() != self.window_size:
+            # Resized: lay out again and show the finished frame in the new layout
+            frame = self.canvas.copy()
+            self.layout()
+            self.canvas.blit(frame, (0, 0))
+        if self.canvas is not self.target:
+            if CANVAS_SMOOTH_SCALE:
+                pygame.transform.smoothscale(self.canvas, self.viewport.size, self.target)
+            else:
+                scale(self.canvas, self.viewport.size, self.target)
+        pygame.display.flip()
+
+    def to_canvas(self, position):
+        """Window pixel position to logical canvas position"""
+        return ((position[0] - self.viewport.x) / self.scale, (position[1] - self.viewport.y) / self.scale)
+
+class Game:
+    def __init__(self, gamepad=True, window_size=None):
+        startup = StartupTimer()
+        
+        # Only video (which brings events) and fonts; no audio, and joystick only with gamepad support
+        pygame.display.init()
+        pygame.font.init()
+        startup.mark('subsystems')
+        self.renderer = Renderer(window_size)
         pygame.display.set_caption("Vampire Survivors Clone")
         self.clock = pygame.time.Clock()
         self.running = True
         self.in_main_menu = True
+        self.gc_control = GCController()
+        self.telemetry = None  # A TelemetryWriter when recording
+        self.checkpoint_path = None  # Level checkpoints are also written here when set
+        self.defer_file_writes = False  # Set by run_async, which writes them on its executor instead
+        startup.mark('window')
+        
+        # Input is sampled once per tick into self.input
+        self.input_handler = InputHandler(gamepad=gamepad)
+        self.input = EMPTY_INPUT
+        startup.mark('input')
+        
+        # Threaded mode: simulation publishes DrawStates, main thread renders them
+        self.draw_buffer = DrawBuffer()
+        self.input_mailbox = InputMailbox()
+        self.sim_lock = threading.Lock()
         
         # Load menu images first
-        self.foreground = pygame.image.load(os.path.join('assets', 'foreground.png'))
-        self.foreground = pygame.transform.scale(self.foreground, (WINDOW_WIDTH, WINDOW_HEIGHT))
+        get_asset_bundle()
+        startup.mark('asset bundle')
+        self.foreground = load_screen_image('foreground.png')
         
-        # Load all background images
+        # Load all background images, already scaled to the window
         self.backgrounds = {
-            1: pygame.image.load(os.path.join('assets', 'background1.png')),
-            2: pygame.image.load(os.path.join('assets', 'background2.png')),
-            3: pygame.image.load(os.path.join('assets', 'background3.png'))
+            1: load_screen_image('background1.png'),
+            2: load_screen_image('background2.png'),
+            3: load_screen_image('background3.png')
         }
         
-        # Scale all backgrounds
-        for level in self.backgrounds:
-            self.backgrounds[level] = pygame.transform.scale(
-                self.backgrounds[level], 
-                (WINDOW_WIDTH, WINDOW_HEIGHT)
-            )
+        startup.mark('screen images')
         
         # Font for menu
         self.font = pygame.font.Font(None, 36)
+        self.overlays = {}  # name -> (content, surface), see cached_overlay
         
         # Main menu buttons
         button_width = 200
@@ -716,13 +1656,22 @@ class Game:
         
         # Initialize game variables but don't create sprites yet
         self.initialize_game_variables()
+        startup.mark('game state')
+        self.startup_timings = startup.phases
+
+    @property
+    def screen(self):
+        """Logical canvas everything draws to"""
+        return self.renderer.canvas
 
     def initialize_game_variables(self):
         """Initialize all game variables but don't create sprites until game starts"""
         self.all_sprites = pygame.sprite.Group()
         self.enemies = pygame.sprite.Group()
-        self.projectiles = pygame.sprite.Group()
+        self.projectiles = ProjectileManager()
+        self.effects = EffectManager()
         self.sing_attacks = pygame.sprite.Group()
+        self.enemy_pool = []  # Killed zombies kept for reuse by later spawns
         self.player = None  # Don't create player yet
         self.level = 1
         self.score = 0
@@ -733,10 +1682,14 @@ class Game:
         # Add shooting variables
         self.shot_delay = 250  # milliseconds between shots
         self.last_shot = 0
-        self.enemy_spawn_timer = 0
-        self.enemy_spawn_delay = 1000
+        self.spawner = SpawnScheduler()
+        self.snapshots = SnapshotRing()
+        self.level_checkpoint = None  # Snapshot taken when the current level started
+        self.ticks_since_snapshot = 0
         self.transition_delay = 3000  # 3 seconds for level transition
         self.transition_timer = 0
+        self.level_started = 0  # For telemetry
+        self.level_damage = 0
 
     def reset_game(self):
         """Create player and reset game state when starting new game"""
@@ -748,20 +1701,46 @@ class Game:
         self.game_over = False
         self.enemies_for_level = self.get_required_enemies()
         
-        # Clear all sprites
+        # Clear all sprites, keeping zombies around for the next run
+        for enemy in self.enemies.sprites():
+            self.release_enemy(enemy)
         self.all_sprites.empty()
-        self.enemies.empty()
-        self.projectiles.empty()
+        self.projectiles.clear()
+        self.effects.clear()
         self.sing_attacks.empty()
         
-        # Create player only when starting game
-        self.player = Player()
+        # Create player on the first start, then just reset it on restart
+        if self.player is None:
+            self.player = Player()
+        else:
+            self.player.reset()
         self.all_sprites.add(self.player)
         
         # Reset timers
-        self.enemy_spawn_timer = 0
-        self.enemy_spawn_delay = 1000
+        self.spawner.start_level(self.level, get_ticks())
         self.last_shot = 0
+        
+        # Fresh rollback history, with the start of level 1 as the first checkpoint
+        self.snapshots.clear()
+        self.ticks_since_snapshot = 0
+        self.checkpoint_level()
+        self.gc_control.enter_gameplay()
+        self.start_level_telemetry()
+
+    def checkpoint_level(self):
+        """Remember the start of the current level for retries, and on disk for resuming"""
+        self.level_checkpoint = save_state(self)
+        if self.checkpoint_path is not None and not self.defer_file_writes:
+            save_checkpoint(self.checkpoint_path, self.level_checkpoint)
+
+    def resume_checkpoint(self, path):
+        """Continue from a level checkpoint written by an earlier session"""
+        load_checkpoint(self, path)
+        self.snapshots.clear()
+        self.ticks_since_snapshot = 0
+        self.checkpoint_level()
+        self.gc_control.enter_gameplay()
+        self.start_level_telemetry()
 
     def get_required_enemies(self):
         if self.level == 1:
@@ -771,25 +1750,35 @@ class Game:
         else:
             return LEVEL_3_ENEMIES
 
-    def show_level_transition(self):
-        # Create semi-transparent overlay
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        overlay.fill(BLACK)
-        overlay.set_alpha(128)
-        self.screen.blit(overlay, (0, 0))
+    def cached_overlay(self, name, content, compose):
+        """Screen composed once and reused until its content changes"""
+        cached = self.overlays.get(name)
+        if cached is None or cached[0] != content:
+            cached = self.overlays[name] = (content, compose())
+        return cached[1]
+
+    def draw_button(self, surface, button, text):
+        pygame.draw.rect(surface, WHITE, button, 2)
+        button_text = self.font.render(text, True, WHITE)
+        surface.blit(button_text, button_text.get_rect(center=button.center))
+
+    def compose_level_transition(self, level):
+        # Semi-transparent overlay, composed with its text onto one surface
+        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((*BLACK, 128))
         
         # Show level completion message
-        if self.level < 3:
-            level_text = self.font.render(f'Level {self.level} Complete!', True, WHITE)
-            next_text = self.font.render(f'Preparing Level {self.level + 1}...', True, WHITE)
+        if level < 3:
+            level_text = self.font.render(f'Level {level} Complete!', True, WHITE)
+            next_text = self.font.render(f'Preparing Level {level + 1}...', True, WHITE)
             
             # Center the text
             level_rect = level_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 20))
             next_rect = next_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 20))
             
             # Draw the text
-            self.screen.blit(level_text, level_rect)
-            self.screen.blit(next_text, next_rect)
+            overlay.blit(level_text, level_rect)
+            overlay.blit(next_text, next_rect)
         else:
             # Special completion message for level 3
             congrats_text = self.font.render('Congratulations!', True, WHITE)
@@ -800,34 +1789,27 @@ class Game:
             clear_rect = clear_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 30))
             
             # Draw the text
-            self.screen.blit(congrats_text, congrats_rect)
-            self.screen.blit(clear_text, clear_rect)
+            overlay.blit(congrats_text, congrats_rect)
+            overlay.blit(clear_text, clear_rect)
             
             # Draw buttons for completion screen
-            pygame.draw.rect(self.screen, WHITE, self.restart_button, 2)
-            pygame.draw.rect(self.screen, WHITE, self.quit_button, 2)
+            self.draw_button(overlay, self.restart_button, 'Restart')
+            self.draw_button(overlay, self.quit_button, 'Quit')
+        return overlay
 
-            # Draw button text
-            restart_text = self.font.render('Restart', True, WHITE)
-            quit_text = self.font.render('Quit', True, WHITE)
-            
-            restart_text_rect = restart_text.get_rect(center=self.restart_button.center)
-            quit_text_rect = quit_text.get_rect(center=self.quit_button.center)
-            
-            self.screen.blit(restart_text, restart_text_rect)
-            self.screen.blit(quit_text, quit_text_rect)
-
-    def show_game_over(self):
-        # Create semi-transparent overlay
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        overlay.fill(BLACK)
-        overlay.set_alpha(192)
+    def show_level_transition(self, level):
+        overlay = self.cached_overlay('transition', (level,), lambda: self.compose_level_transition(level))
         self.screen.blit(overlay, (0, 0))
+
+    def compose_game_over(self, level, kills):
+        # Semi-transparent overlay, composed with its text onto one surface
+        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((*BLACK, 192))
         
         # Show game over message
         game_over_text = self.font.render('Game Over!', True, RED)
-        score_text = self.font.render(f'Enemies Killed: {self.enemies_killed}', True, WHITE)
-        level_text = self.font.render(f'Level Reached: {self.level}', True, WHITE)
+        score_text = self.font.render(f'Enemies Killed: {kills}', True, WHITE)
+        level_text = self.font.render(f'Level Reached: {level}', True, WHITE)
         
         # Center the text
         game_over_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 40))
@@ -835,38 +1817,32 @@ class Game:
         level_rect = level_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 40))
         
         # Draw the text
-        self.screen.blit(game_over_text, game_over_rect)
-        self.screen.blit(score_text, score_rect)
-        self.screen.blit(level_text, level_rect)
+        overlay.blit(game_over_text, game_over_rect)
+        overlay.blit(score_text, score_rect)
+        overlay.blit(level_text, level_rect)
 
         # Draw buttons
-        pygame.draw.rect(self.screen, WHITE, self.restart_button, 2)
-        pygame.draw.rect(self.screen, WHITE, self.quit_button, 2)
+        self.draw_button(overlay, self.restart_button, 'Restart')
+        self.draw_button(overlay, self.quit_button, 'Quit')
+        return overlay
 
-        # Draw button text
-        restart_text = self.font.render('Restart', True, WHITE)
-        quit_text = self.font.render('Quit', True, WHITE)
-        
-        restart_text_rect = restart_text.get_rect(center=self.restart_button.center)
-        quit_text_rect = quit_text.get_rect(center=self.quit_button.center)
-        
-        self.screen.blit(restart_text, restart_text_rect)
-        self.screen.blit(quit_text, quit_text_rect)
+    def show_game_over(self, level, kills):
+        overlay = self.cached_overlay('game_over', (level, kills), lambda: self.compose_game_over(level, kills))
+        self.screen.blit(overlay, (0, 0))
 
-    def show_main_menu(self):
-        # Draw foreground
-        self.screen.blit(self.foreground, (0, 0))
-        
-        # Draw buttons
+    def compose_main_menu(self):
+        # Foreground with the buttons drawn in
+        menu = self.foreground.copy()
         for button, text in [
             (self.start_button, 'Start'),
             (self.settings_button, 'Settings'),
             (self.menu_quit_button, 'Quit')
         ]:
-            pygame.draw.rect(self.screen, WHITE, button, 2)
-            button_text = self.font.render(text, True, WHITE)
-            text_rect = button_text.get_rect(center=button.center)
-            self.screen.blit(button_text, text_rect)
+            self.draw_button(menu, button, text)
+        return menu
+
+    def show_main_menu(self):
+        self.screen.blit(self.cached_overlay('menu', (), self.compose_main_menu), (0, 0))
 
     def handle_menu_click(self, pos):
         if self.start_button.collidepoint(pos):
@@ -879,49 +1855,67 @@ class Game:
             self.running = False
 
     def handle_events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = event.pos
-                if self.in_main_menu:
-                    self.handle_menu_click(mouse_pos)
-                elif (self.game_over or (self.level == 3 and self.enemies_killed >= LEVEL_3_ENEMIES)):
-                    if self.restart_button.collidepoint(mouse_pos):
-                        self.reset_game()
-                    elif self.quit_button.collidepoint(mouse_pos):
-                        self.running = False
-            
-            # Only handle other events if not in main menu
-            if not self.in_main_menu:
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.running = False
-                    elif event.key == pygame.K_e:
-                        self.player.sing_attack(self)
-                    elif event.key == pygame.K_t:
-                        if self.level < 3:
-                            self.enemies_killed = self.enemies_for_level
-                            self.check_level_up()
-                    elif event.key == pygame.K_SPACE:
-                        if not self.player.is_recharging:
-                            if self.player.shoot():
-                                self.player.is_shooting = True
-                                self.player.shot_frame = 0
-                                self.shoot()
-
-        # Only handle continuous space press if not in main menu
+        # Sample every input device once; everything below reads this snapshot
+        self.input = self.input_handler.poll()
+
+        if self.input.quit_requested:
+            self.running = False
+
+        self.handle_clicks(self.input.clicks)
+
+        # Only handle gameplay actions if not in main menu
         if not self.in_main_menu:
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_SPACE] and not self.player.is_recharging:
-                current_time = pygame.time.get_ticks()
-                if current_time - self.last_shot > self.shot_delay:
-                    if self.player.shoot():
-                        self.shoot()
-                        self.last_shot = current_time
+            self.apply_input(self.input)
+
+    def handle_clicks(self, clicks):
+        for window_pos in clicks:
+            mouse_pos = self.renderer.to_canvas(window_pos)
+            if self.in_main_menu:
+                self.handle_menu_click(mouse_pos)
+            elif (self.game_over or (self.level == 3 and self.enemies_killed >= LEVEL_3_ENEMIES)):
+                if self.restart_button.collidepoint(mouse_pos):
+                    self.reset_game()
+                elif self.quit_button.collidepoint(mouse_pos):
+                    self.running = False
+
+    def apply_input(self, controls):
+        """Act on one tick of gameplay input, from the devices or a scripted player"""
+        self.input = controls
+        self.player.input_state = controls
+
+        if self.input.was_pressed('quit'):
+            self.running = False
+        if self.input.was_pressed('sing'):
+            self.player.sing_attack(self)
+        if self.input.was_pressed('skip_level'):
+            if self.level < 3:
+                self.enemies_killed = self.enemies_for_level
+                self.check_level_up()
+        # Both can bring the player back from the game-over screen, so pauses count as gameplay again
+        if self.input.was_pressed('retry_level') and self.level_checkpoint is not None:
+            load_state(self, self.level_checkpoint)
+            self.snapshots.clear()
+            self.ticks_since_snapshot = 0
+            self.gc_control.resume()
+            # A new attempt: time and damage for level_complete start over
+            self.start_level_telemetry()
+        if self.input.was_pressed('rewind') and self.snapshots.rollback(self):
+            # Count towards the next snapshot from the restored moment
+            self.ticks_since_snapshot = 0
+            self.gc_control.resume()
+
+        # Single fire path for taps and held key so one tick never fires twice
+        if self.input.is_held('fire') and not self.player.is_recharging:
+            current_time = get_ticks()
+            if current_time - self.last_shot > self.shot_delay:
+                if self.player.shoot():
+                    self.player.is_shooting = True
+                    if self.input.was_pressed('fire'):
+                        self.player.shot_frame = 0
+                    self.shoot()
 
     def shoot(self):
-        current_time = pygame.time.get_ticks()
+        current_time = get_ticks()
         if current_time - self.last_shot > self.shot_delay:
             if self.level == 1:
                 # Single straight projectile for level 1
@@ -933,41 +1927,45 @@ class Game:
                 # Arc attack for level 3
                 self.shoot_arc()
             self.last_shot = current_time
+            
+            direction = self.player.last_direction
+            self.effects.muzzle_flash(self.player.rect.centerx + direction[0] * 20,
+                                      self.player.rect.centery + direction[1] * 20,
+                                      direction, current_time)
 
     def shoot_triple(self):
         # Center bullet
         self.shoot_single()
         
+        current_time = get_ticks()
+        
         # Left bullet (offset by 15 degrees)
         angle_left = math.atan2(-self.player.last_direction[1], self.player.last_direction[0]) - math.radians(15)
         direction_left = (math.cos(angle_left), -math.sin(angle_left))
-        projectile_left = Projectile(
+        self.projectiles.spawn(
             self.player.rect.centerx,
             self.player.rect.centery,
-            direction_left
+            direction_left,
+            current_time
         )
-        self.all_sprites.add(projectile_left)
-        self.projectiles.add(projectile_left)
         
         # Right bullet (offset by 15 degrees)
         angle_right = math.atan2(-self.player.last_direction[1], self.player.last_direction[0]) + math.radians(15)
         direction_right = (math.cos(angle_right), -math.sin(angle_right))
-        projectile_right = Projectile(
+        self.projectiles.spawn(
             self.player.rect.centerx,
             self.player.rect.centery,
-            direction_right
+            direction_right,
+            current_time
         )
-        self.all_sprites.add(projectile_right)
-        self.projectiles.add(projectile_right)
 
     def shoot_single(self):
-        projectile = Projectile(
+        self.projectiles.spawn(
             self.player.rect.centerx,
             self.player.rect.centery,
-            self.player.last_direction
+            self.player.last_direction,
+            get_ticks()
         )
-        self.all_sprites.add(projectile)
-        self.projectiles.add(projectile)
 
     def shoot_arc(self):
         # Calculate the base angle from player's direction
@@ -979,160 +1977,837 @@ class Game:
         start_angle = base_angle - (ARC_SPREAD / 2)
         
         # Create arc of projectiles
+        current_time = get_ticks()
         for i in range(ARC_PROJECTILE_COUNT):
             angle = math.radians(start_angle + (angle_step * i))
             direction = (math.cos(angle), -math.sin(angle))
             
-            projectile = Projectile(
+            self.projectiles.spawn(
                 self.player.rect.centerx,
                 self.player.rect.centery,
-                direction
+                direction,
+                current_time
             )
-            self.all_sprites.add(projectile)
-            self.projectiles.add(projectile)
+
+    def acquire_enemy(self, level, position=None, kind=None):
+        """Spawn a zombie, reusing a pooled one (of any type) when available"""
+        if self.enemy_pool:
+            enemy = self.enemy_pool.pop()
+            enemy.reset(self.player, level, position, kind)
+        else:
+            enemy = Enemy(self.player, level, position, kind)
+        self.all_sprites.add(enemy)
+        self.enemies.add(enemy)
+        return enemy
+
+    def kill_enemy(self, enemy, current_time, explode=False):
+        """Take a killed zombie out of play with a death effect"""
+        self.record('kill', self.level, enemy.kind.id, explode)
+        x, y = enemy.rect.center
+        if explode:
+            self.effects.explosion(x, y, current_time)
+        else:
+            self.effects.death_burst(x, y, current_time)
+        self.release_enemy(enemy)
+
+    def release_enemy(self, enemy):
+        """Remove a zombie from play and keep it for the next spawn"""
+        enemy.kill()
+        self.enemy_pool.append(enemy)
 
     def spawn_enemy(self):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.enemy_spawn_timer > self.enemy_spawn_delay:
-            # Spawn multiple enemies based on level
-            spawn_amount = 1 if self.level == 1 else 3 if self.level == 2 else 2
-            
-            for _ in range(spawn_amount):
-                enemy = Enemy(self.player, self.level)
-                self.all_sprites.add(enemy)
-                self.enemies.add(enemy)
-            
-            self.enemy_spawn_timer = current_time
+        self.spawner.update(self, get_ticks())
 
-    def check_collisions(self):
+    def check_collisions(self, current_time):
         # Check player collision with enemies that are in damage range
         for enemy in self.enemies:
             dx = self.player.rect.centerx - enemy.rect.centerx
             dy = self.player.rect.centery - enemy.rect.centery
             dist = math.sqrt(dx ** 2 + dy ** 2)
             
-            if dist <= enemy.attack_damage_distance:
+            if dist <= enemy.attack_range:
                 if not self.player.invulnerable:
                     self.player.health -= 5
+                    self.level_damage += 5
+                    self.record('damage', 5, self.player.health, self.level)
                     self.player.take_damage()
                     if self.player.health <= 0:
                         self.player.die()  # Start death animation
-                        self.transition_timer = pygame.time.get_ticks()
+                        self.transition_timer = get_ticks()
 
         # Count enemies killed by projectiles
-        projectile_hits = pygame.sprite.groupcollide(self.projectiles, self.enemies, True, True)
-        self.enemies_killed += len(projectile_hits)
+        self.enemies_killed += self.resolve_projectile_hits(current_time)
         
         # Count enemies killed by sing attack
         for sing in self.sing_attacks:
-            sing_hits = pygame.sprite.spritecollide(sing, self.enemies, True)
+            sing_hits = pygame.sprite.spritecollide(sing, self.enemies, False)
+            for enemy in sing_hits:
+                self.kill_enemy(enemy, current_time, explode=True)
             self.enemies_killed += len(sing_hits)
         
         self.check_level_up()
 
+    def resolve_projectile_hits(self, current_time):
+        """Sweep every bullet along this tick's path and kill the first enemy it reaches"""
+        enemies = self.enemies.sprites()
+        bullets = self.projectiles
+        if not enemies or not bullets:
+            return 0
+        # Broadphase works on the drawn sprite area; masks decide the actual hit
+        enemy_rects = [enemy.sprite_rect() for enemy in enemies]
+
+        # Gather every (time of impact, bullet, enemy) candidate across all bullets
+        hits = []
+        for i in range(bullets.count):
+            x0, y0 = bullets.prev_x[i], bullets.prev_y[i]
+            dx = bullets.x[i] - x0
+            dy = bullets.y[i] - y0
+            frame = bullets.frame[i]
+            half_w, half_h = bullets.half_sizes[frame]
+
+            # Broadphase: box around the whole path, tested against all enemies in C
+            path = pygame.Rect(
+                min(x0, x0 + dx) - half_w,
+                min(y0, y0 + dy) - half_h,
+                abs(dx) + half_w * 2 + 1,
+                abs(dy) + half_h * 2 + 1
+            )
+            for index in path.collidelistall(enemy_rects):
+                # Bullet centre path vs sprite box grown by the bullet size
+                rect = enemy_rects[index]
+                t = segment_box_entry(
+                    x0, y0, dx, dy,
+                    rect.left - half_w, rect.top - half_h,
+                    rect.right + half_w, rect.bottom + half_h
+                )
+                if t is None:
+                    continue
+                # Narrowphase: walk the bullet mask along the path until it touches the frame mask
+                enemy_mask = FRAME_MASKS.get(enemies[index].image)
+                if enemy_mask is not None:
+                    t = mask_contact_time(
+                        bullets.masks[frame], x0, y0, dx, dy,
+                        t, enemy_mask, rect.topleft
+                    )
+                if t is not None:
+                    hits.append((t, i, index))
+
+        # Earliest impacts win; each bullet and each enemy is used at most once
+        hits.sort()
+        spent = set()
+        kills = 0
+        for _, i, index in hits:
+            enemy = enemies[index]
+            if i not in spent and enemy.alive():
+                spent.add(i)
+                self.kill_enemy(enemy, current_time)
+                kills += 1
+
+        # Remove highest slots first so swap-remove never moves a bullet still to be removed
+        for i in sorted(spent, reverse=True):
+            bullets.remove(i)
+        return kills
+
     def check_level_up(self):
         if self.enemies_killed >= self.enemies_for_level and not self.transitioning:
             self.transitioning = True
-            self.transition_timer = pygame.time.get_ticks()
+            self.transition_timer = get_ticks()
+            self.record('level_complete', self.level, self.transition_timer - self.level_started, self.level_damage)
             # Clear all enemies from screen
-            for enemy in self.enemies:
-                enemy.kill()
+            for enemy in self.enemies.sprites():
+                self.release_enemy(enemy)
             
             # Don't end the game immediately when level 3 is complete
             if self.level == 3:
                 self.game_over = True  # Show game over screen instead
+            self.gc_control.enter_break('level transition')
 
     def handle_level_transition(self):
-        if self.transitioning:
-            current_time = pygame.time.get_ticks()
+        # Level 3 has no next level; its completion screen stays up
+        if self.transitioning and self.level < 3:
+            current_time = get_ticks()
             if current_time - self.transition_timer >= self.transition_delay:
                 self.level += 1
                 self.enemies_killed = 0
                 self.enemies_for_level = self.get_required_enemies()
-                # Adjust spawn delay based on level
-                if self.level == 2:
-                    self.enemy_spawn_delay = 1500  # Longer delay for multiple spawns
-                else:
-                    self.enemy_spawn_delay = 1000
+                # Switch to the new level's spawn plan
+                self.spawner.start_level(self.level, current_time)
                 self.transitioning = False
+                self.checkpoint_level()
+                self.gc_control.resume()
+                self.start_level_telemetry()
+
+    def record(self, event, *values):
+        if self.telemetry is not None:
+            self.telemetry.record(event, *values)
 
-    def draw_hud(self):
+    def start_level_telemetry(self):
+        self.level_started = get_ticks()
+        self.level_damage = 0
+        self.record('level_start', self.level)
+
+    def hud_values(self):
+        return HudValues(
+            self.player.health, self.player.max_health, self.level,
+            self.enemies_killed, self.enemies_for_level,
+            self.player.current_ammo, self.player.max_ammo, self.player.is_recharging
+        )
+
+    def draw_hud(self, hud=None):
+        if hud is None:
+            hud = self.hud_values()
+        
         # Draw health bar
-        health_width = 200 * (self.player.health / self.player.max_health)
+        health_width = 200 * (hud.health / hud.max_health)
         pygame.draw.rect(self.screen, RED, (10, 10, health_width, 20))
         pygame.draw.rect(self.screen, WHITE, (10, 10, 200, 20), 2)
         
         # Draw level info
-        level_text = self.font.render(f'Level: {self.level}', True, WHITE)
+        level_text = self.font.render(f'Level: {hud.level}', True, WHITE)
         self.screen.blit(level_text, (10, 40))
         
         # Draw enemies killed progress
         progress_text = self.font.render(
-            f'Enemies: {self.enemies_killed}/{self.enemies_for_level}', 
+            f'Enemies: {hud.enemies_killed}/{hud.enemies_for_level}', 
             True, WHITE
         )
         self.screen.blit(progress_text, (10, 70))
         
         # Draw ammo counter
-        ammo_text = self.font.render(f'Ammo: {self.player.current_ammo}/{self.player.max_ammo}', True, WHITE)
+        ammo_text = self.font.render(f'Ammo: {hud.ammo}/{hud.max_ammo}', True, WHITE)
         self.screen.blit(ammo_text, (10, 100))  # Position below enemies counter
         
         # Show "RECHARGING" text when recharging
-        if self.player.is_recharging:
+        if hud.recharging:
             recharge_text = self.font.render('RECHARGING...', True, YELLOW)
             self.screen.blit(recharge_text, (10, 130))
 
-    def run(self):
+    def update_world(self):
+        """Advance the simulation by one tick; no input polling and no drawing"""
+        current_time = get_ticks()
+        self.gc_control.frame += 1
+        
+        # Check if death animation is complete
+        if self.player.is_dead and not self.game_over:
+            if current_time - self.player.death_start_time >= self.player.death_duration:
+                self.game_over = True
+                self.record('death', self.level, self.enemies_killed)
+                self.gc_control.enter_break('game over')
+        
+        # Only update game if not in transition, not dead, and not game over
+        if not self.transitioning and not self.game_over and not self.player.is_dead:
+            if not (self.level == 3 and self.enemies_killed >= LEVEL_3_ENEMIES):
+                self.spawn_enemy()
+            self.all_sprites.update()
+            self.projectiles.update(current_time)
+            # Kill effects take this tick's time, the same time effects.update ages them by
+            self.check_collisions(current_time)
+            
+            # Periodic snapshot for rewinding
+            self.ticks_since_snapshot += 1
+            if self.ticks_since_snapshot >= SNAPSHOT_INTERVAL:
+                self.ticks_since_snapshot = 0
+                self.snapshots.push(self)
+        elif self.player.is_dead:
+            self.player.update()
+        
+        # Effects play out through transitions and game over too
+        self.effects.update(current_time)
+        self.handle_level_transition()
+
+    def draw_world(self):
+        self.screen.blit(self.backgrounds[self.level], (0, 0))
+        
+        for sprite in self.all_sprites:
+            if sprite != self.player and not isinstance(sprite, Enemy):
+                self.screen.blit(sprite.image, sprite.rect)
+        
+        self.projectiles.draw(self.screen)
+        
+        for enemy in self.enemies:
+            enemy.draw(self.screen)
+        
+        self.effects.draw(self.screen)
+        
+        self.player.draw(self.screen)
+        
+        self.draw_hud()
+        
+        # Show appropriate overlay screen
+        if self.transitioning:
+            self.show_level_transition(self.level)
+        elif self.game_over:
+            self.show_game_over(self.level, self.enemies_killed)
+
+    def build_draw_state(self):
+        """Capture what the renderer needs from this tick, as plain immutable values"""
+        bullets = self.projectiles
+        count = bullets.count
+        player = self.player
+        return DrawState(
+            time=time.perf_counter(),
+            level=self.level,
+            effects=tuple((sprite.image, sprite.rect.topleft) for sprite in self.sing_attacks),
+            # Bullets carry their own previous position, so they interpolate without ids
+            bullets=tuple(zip(bullets.prev_x[:count], bullets.prev_y[:count],
+                              bullets.x[:count], bullets.y[:count], bullets.frame[:count])),
+            enemies=tuple((id(enemy), enemy.image,
+                           (enemy.rect.x + enemy.sprite_offset_x, enemy.rect.y + enemy.sprite_offset_y))
+                          for enemy in self.enemies),
+            particles=tuple(self.effects.blit_sequence()),
+            player=(player.image, (player.rect.x + player.sprite_offset_x, player.rect.y + player.sprite_offset_y)),
+            player_flashing=player.is_flashing(),
+            hud=self.hud_values(),
+            transitioning=self.transitioning,
+            game_over=self.game_over,
+        )
+
+    def render_draw_state(self, previous, latest):
+        """Draw a frame between the two latest simulation steps"""
+        alpha = 1.0
+        if previous is not None and latest.time > previous.time:
+            alpha = min(1.0, (time.perf_counter() - latest.time) / (latest.time - previous.time))
+        old_enemies = {key: position for key, _, position in previous.enemies} if previous else {}
+        old_player = previous.player[1] if previous else None
+        
+        self.screen.blit(self.backgrounds[latest.level], (0, 0))
+        
+        for image, position in latest.effects:
+            self.screen.blit(image, position)
+        
+        images, half_sizes = self.projectiles.images, self.projectiles.half_sizes
+        self.screen.blits([
+            (images[frame], (x0 + (x1 - x0) * alpha - half_sizes[frame][0],
+                             y0 + (y1 - y0) * alpha - half_sizes[frame][1]))
+            for x0, y0, x1, y1, frame in latest.bullets
+        ], False)
+        
+        self.screen.blits([
+            (image, lerp_position(old_enemies.get(key), position, alpha))
+            for key, image, position in latest.enemies
+        ], False)
+        
+        self.screen.blits(latest.particles, False)
+        
+        image, position = latest.player
+        blit_player_image(self.screen, image, lerp_position(old_player, position, alpha), latest.player_flashing)
+        
+        self.draw_hud(latest.hud)
+        
+        # Overlays read the same published values as the HUD, never the live game
+        if latest.transitioning:
+            self.show_level_transition(latest.hud.level)
+        elif latest.game_over:
+            self.show_game_over(latest.hud.level, latest.hud.enemies_killed)
+
+    def simulation_loop(self):
+        """Fixed-rate simulation for threaded mode; publishes a DrawState every tick"""
+        tick_seconds = 1 / FPS
+        next_tick = time.perf_counter()
         while self.running:
-            self.clock.tick(FPS)
-            self.handle_events()
+            with self.sim_lock:
+                if not self.in_main_menu:
+                    update_start = time.perf_counter()
+                    self.apply_input(self.input_mailbox.take())
+                    self.update_world()
+                    self.record('frame', (time.perf_counter() - update_start) * 1000, 0)
+                    self.draw_buffer.publish(self.build_draw_state())
+            next_tick += tick_seconds
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()  # Fell behind: don't try to catch up in a burst
+
+    def run_threaded(self):
+        """Simulate on a worker thread while this thread polls input and renders"""
+        simulation = threading.Thread(target=self.simulation_loop, name='simulation', daemon=True)
+        simulation.start()
+        while self.running:
+            self.clock.tick(RENDER_FPS)
+            controls = self.input_handler.poll()
+            if controls.quit_requested:
+                self.running = False
             
-            if self.in_main_menu:
+            # Clicks can restart the game, so keep the simulation out while they run
+            if controls.clicks:
+                with self.sim_lock:
+                    self.handle_clicks(controls.clicks)
+                    # A restart moves everything; don't interpolate from the old game
+                    self.draw_buffer.clear()
+                    if not self.in_main_menu:
+                        self.draw_buffer.publish(self.build_draw_state())
+            if not self.in_main_menu:
+                self.input_mailbox.post(controls)
+            
+            previous, latest = self.draw_buffer.read()
+            if self.in_main_menu or latest is None:
                 self.show_main_menu()
-                pygame.display.flip()
             else:
-                current_time = pygame.time.get_ticks()
-                
-                # Check if death animation is complete
-                if self.player.is_dead and not self.game_over:
-                    if current_time - self.player.death_start_time >= self.player.death_duration:
-                        self.game_over = True
-                
-                # Only update game if not in transition, not dead, and not game over
-                if not self.transitioning and not self.game_over and not self.player.is_dead:
-                    if not (self.level == 3 and self.enemies_killed >= LEVEL_3_ENEMIES):
-                        self.spawn_enemy()
-                    self.all_sprites.update()
-                    self.check_collisions()
-                elif self.player.is_dead:
-                    self.player.update()
-                
-                self.handle_level_transition()
-                
-                # Draw game
-                self.screen.blit(self.backgrounds[self.level], (0, 0))
-                
-                for sprite in self.all_sprites:
-                    if sprite != self.player and not isinstance(sprite, Enemy):
-                        self.screen.blit(sprite.image, sprite.rect)
-                
-                for enemy in self.enemies:
-                    enemy.draw(self.screen)
-                
-                self.player.draw(self.screen)
-                
-                self.draw_hud()
+                self.render_draw_state(previous, latest)
+            self.renderer.present()
+        
+        simulation.join()
+        self.shutdown()
+
+    def run_frame(self):
+        """One frame of the single-threaded loops: events, a menu or a tick plus drawing, present"""
+        self.handle_events()
+        
+        if self.in_main_menu:
+            self.show_main_menu()
+        else:
+            update_start = time.perf_counter()
+            self.update_world()
+            draw_start = time.perf_counter()
+            self.draw_world()
+            self.record('frame', (draw_start - update_start) * 1000, (time.perf_counter() - draw_start) * 1000)
+        self.renderer.present()
+
+    def run(self):
+        while self.running:
+            self.clock.tick(FPS)
+            self.run_frame()
+
+        self.shutdown()
+
+    async def prefetch_assets(self, executor):
+        """Decode every zombie type's frames before a level asks for them"""
+        loop = asyncio.get_running_loop()
+        for name, zombie_type in ZOMBIE_TYPES.items():
+            for animation in (zombie_type.walk, zombie_type.attack):
+                key = (zombie_type.folder, *animation, 1)
+                if key not in _animation_cache:
+                    # Decode on a worker; the caches are only ever changed from the loop thread
+                    frames, masks = await loop.run_in_executor(executor, decode_animation, *key)
+                    install_animation(key, frames, masks)
+            get_zombie_kind(name)  # Frames are cached by now, so this is cheap
+
+    async def flush_telemetry(self, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(TELEMETRY_FLUSH_INTERVAL)
+            if self.telemetry is not None:
+                await loop.run_in_executor(executor, self.telemetry.flush)
+
+    async def save_score(self, executor):
+        """Append the run that just ended to SCORES_PATH"""
+        record = {
+            'time': time.time(), 'level': self.level, 'kills': self.enemies_killed,
+            'completed': not self.player.is_dead,
+        }
+        await asyncio.get_running_loop().run_in_executor(executor, append_score, SCORES_PATH, record)
+
+    async def write_checkpoint(self, executor, lock, data):
+        """Write a level checkpoint off the frame; the lock keeps writes in the order they were made"""
+        async with lock:
+            await asyncio.get_running_loop().run_in_executor(executor, save_checkpoint, self.checkpoint_path, data)
+
+    async def run_async(self):
+        """Frame-paced loop on asyncio; background coroutines run in the gap after each frame"""
+        loop = asyncio.get_running_loop()
+        asyncio.current_task().set_name('frame loop')
+        guard = SlowCallbackGuard(loop)
+        # Threads, not processes: the work here is file I/O and pygame decoding, which release the GIL
+        executor = ThreadPoolExecutor(BACKGROUND_WORKERS, thread_name_prefix='background')
+        background = [
+            asyncio.create_task(self.prefetch_assets(executor), name='asset prefetch'),
+            asyncio.create_task(self.flush_telemetry(executor), name='telemetry flush'),
+        ]
+        saves = set()
+        was_over = False
+        self.defer_file_writes = True
+        written_checkpoint = self.level_checkpoint
+        checkpoint_lock = asyncio.Lock()
+        frame_seconds = 1 / FPS
+        next_frame = loop.time()
+        try:
+            while self.running:
+                self.run_frame()
                 
-                # Show appropriate overlay screen
-                if self.transitioning:
-                    self.show_level_transition()
-                elif self.game_over:
-                    self.show_game_over()
+                # Save each finished run once, off the frame
+                if self.game_over and not was_over:
+                    task = asyncio.create_task(self.save_score(executor), name='score save')
+                    saves.add(task)
+                    task.add_done_callback(saves.discard)
+                was_over = self.game_over
+                # Likewise each new level checkpoint
+                if self.checkpoint_path is not None and self.level_checkpoint is not written_checkpoint:
+                    task = asyncio.create_task(self.write_checkpoint(executor, checkpoint_lock, self.level_checkpoint),
+                                               name='checkpoint save')
+                    saves.add(task)
+                    task.add_done_callback(saves.discard)
+                written_checkpoint = self.level_checkpoint
                 
-                pygame.display.flip()
+                # Sleep until the next frame is due; this is when background work runs
+                next_frame += frame_seconds
+                delay = next_frame - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    next_frame = loop.time()  # Fell behind: don't try to catch up in a burst
+                    await asyncio.sleep(0)
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, *saves, return_exceptions=True)
+            executor.shutdown(wait=True)
+            guard.close()
+            self.shutdown()
 
+    def shutdown(self):
+        self.gc_control.close()
+        if self.telemetry is not None:
+            self.telemetry.close()
         pygame.quit()
 
+# Binary snapshot layout. Times are stored relative to the save moment so a
+# snapshot can be loaded at any later get_ticks() value.
+SNAPSHOT_MAGIC = b'ZQGS'
+SNAPSHOT_VERSION = 3
+SNAPSHOT_HEADER = struct.Struct('<4sH')
+SNAPSHOT_GAME = struct.Struct('<BiiiiiI??iI')
+SNAPSHOT_RNG = struct.Struct('<I625I?d')
+SNAPSHOT_SPAWNER = struct.Struct('<BIIIIiIIH')
+SNAPSHOT_SPAWN = struct.Struct('<hhB')  # position, zombie type index
+SNAPSHOT_PLAYER = struct.Struct('<hh?iBiddi?iBdBd?Bdi??BiBdB?i?Bdi')
+SNAPSHOT_ENEMY = struct.Struct('<BhhBd??Bf')
+SNAPSHOT_SING = struct.Struct('<hd')
+SNAPSHOT_COUNT = struct.Struct('<I')
+
+def save_state(game):
+    """Pack the whole simulation into a compact byte string in O(entities)"""
+    now = get_ticks()
+    out = bytearray(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+
+    out += SNAPSHOT_GAME.pack(
+        game.level, game.score, game.enemies_killed, game.enemies_for_level,
+        game.last_shot - now, game.transition_timer - now, game.shot_delay,
+        game.transitioning, game.game_over, game.level_started - now, game.level_damage
+    )
+
+    rng_version, rng_words, gauss_next = random.getstate()
+    out += SNAPSHOT_RNG.pack(rng_version, *rng_words, gauss_next is not None, gauss_next or 0.0)
+
+    spawner = game.spawner
+    out += SNAPSHOT_SPAWNER.pack(
+        spawner.level, spawner.pending, spawner.scheduled, spawner.spawned,
+        spawner.plan['delay'], spawner.next_burst_time - now,
+        spawner.plan['burst'], spawner.plan['total'], len(spawner.spawns)
+    )
+    for position, kind in spawner.spawns:
+        out += SNAPSHOT_SPAWN.pack(*position, kind.id)
+
+    player = game.player
+    out += SNAPSHOT_PLAYER.pack(
+        player.rect.x, player.rect.y, player.facing_left, player.experience, player.level,
+        player.health, player.last_direction[0], player.last_direction[1], player.last_sing - now,
+        player.is_shooting, player.shot_timer - now, player.shot_frame, player.shot_animation_timer,
+        player.current_frame, player.animation_timer,
+        player.is_hurt, player.hurt_frame, player.hurt_animation_timer,
+        player.hurt_start_time - now, player.invulnerable,
+        player.hurt_flash, player.current_flash, player.last_flash - now,
+        player.recharge_frame, player.recharge_animation_timer, player.current_ammo,
+        player.is_recharging, player.recharge_start_time - now,
+        player.is_dead, player.death_frame, player.death_animation_timer, player.death_start_time - now
+    )
+
+    enemies = game.enemies.sprites()
+    out += SNAPSHOT_COUNT.pack(len(enemies))
+    for enemy in enemies:
+        out += SNAPSHOT_ENEMY.pack(
+            enemy.kind.id, enemy.rect.x, enemy.rect.y, enemy.current_frame, enemy.animation_timer,
+            enemy.facing_left, enemy.is_attacking, enemy.attack_frame, enemy.speed
+        )
+
+    # Bullets are already flat arrays: copy each live column as raw bytes
+    bullets = game.projectiles
+    out += SNAPSHOT_COUNT.pack(bullets.count)
+    spawn_time = array('q', (t - now for t in bullets.spawn_time[:bullets.count]))
+    for column in bullets._columns:
+        out += (spawn_time if column is bullets.spawn_time else column[:bullets.count]).tobytes()
+
+    sings = game.sing_attacks.sprites()
+    out += SNAPSHOT_COUNT.pack(len(sings))
+    for sing in sings:
+        out += SNAPSHOT_SING.pack(sing.radius, sing.alpha)
+    return bytes(out)
+
+def load_state(game, data):
+    """Restore a snapshot from save_state, reusing pooled entities where possible"""
+    now = get_ticks()
+    magic, version = SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f'not a version {SNAPSHOT_VERSION} game snapshot')
+    offset = SNAPSHOT_HEADER.size
+
+    (game.level, game.score, game.enemies_killed, game.enemies_for_level,
+     last_shot, transition_timer, game.shot_delay,
+     game.transitioning, game.game_over, level_started, game.level_damage) = SNAPSHOT_GAME.unpack_from(data, offset)
+    game.last_shot = last_shot + now
+    game.transition_timer = transition_timer + now
+    game.level_started = level_started + now
+    game.in_main_menu = False
+    offset += SNAPSHOT_GAME.size
+
+    rng = SNAPSHOT_RNG.unpack_from(data, offset)
+    random.setstate((rng[0], tuple(rng[1:626]), rng[627] if rng[626] else None))
+    offset += SNAPSHOT_RNG.size
+
+    (level, pending, scheduled, spawned, delay, next_burst_time,
+     burst, total, spawn_count) = SNAPSHOT_SPAWNER.unpack_from(data, offset)
+    offset += SNAPSHOT_SPAWNER.size
+    spawner = game.spawner
+    spawner.level = level
+    spawner.plan = {'delay': delay, 'burst': burst, 'total': total}  # The mix only matters in start_level
+    spawner.pending, spawner.scheduled, spawner.spawned = pending, scheduled, spawned
+    spawner.next_burst_time = next_burst_time + now
+    spawner.spawns = deque()
+    for _ in range(spawn_count):
+        x, y, kind_id = SNAPSHOT_SPAWN.unpack_from(data, offset)
+        offset += SNAPSHOT_SPAWN.size
+        spawner.spawns.append(((x, y), zombie_kind_by_id(kind_id)))
+
+    if game.player is None:
+        game.player = Player()
+    player = game.player
+    (player.rect.x, player.rect.y, player.facing_left, player.experience, player.level,
+     player.health, direction_x, direction_y, last_sing,
+     player.is_shooting, shot_timer, player.shot_frame, player.shot_animation_timer,
+     player.current_frame, player.animation_timer,
+     player.is_hurt, player.hurt_frame, player.hurt_animation_timer,
+     hurt_start_time, player.invulnerable,
+     player.hurt_flash, player.current_flash, last_flash,
+     player.recharge_frame, player.recharge_animation_timer, player.current_ammo,
+     player.is_recharging, recharge_start_time,
+     player.is_dead, player.death_frame, player.death_animation_timer,
+     death_start_time) = SNAPSHOT_PLAYER.unpack_from(data, offset)
+    offset += SNAPSHOT_PLAYER.size
+    player.last_direction = (direction_x, direction_y)
+    player.last_sing = last_sing + now
+    player.shot_timer = shot_timer + now
+    player.hurt_start_time = hurt_start_time + now
+    player.last_flash = last_flash + now
+    player.recharge_start_time = recharge_start_time + now
+    player.death_start_time = death_start_time + now
+    player.refresh_image()
+
+    # Rebuild the sprite groups around the restored player
+    for enemy in game.enemies.sprites():
+        game.release_enemy(enemy)
+    game.all_sprites.empty()
+    game.sing_attacks.empty()
+    game.effects.clear()
+    game.all_sprites.add(player)
+
+    (enemy_count,) = SNAPSHOT_COUNT.unpack_from(data, offset)
+    offset += SNAPSHOT_COUNT.size
+    for _ in range(enemy_count):
+        (kind_id, x, y, current_frame, animation_timer, facing_left, is_attacking,
+         attack_frame, speed) = SNAPSHOT_ENEMY.unpack_from(data, offset)
+        offset += SNAPSHOT_ENEMY.size
+        enemy = game.acquire_enemy(game.level, (x, y), zombie_kind_by_id(kind_id))
+        enemy.current_frame = current_frame
+        enemy.animation_timer = animation_timer
+        enemy.facing_left = facing_left
+        enemy.is_attacking = is_attacking
+        enemy.attack_frame = attack_frame
+        enemy.speed = speed
+        enemy.refresh_image()
+
+    bullets = game.projectiles
+    (bullet_count,) = SNAPSHOT_COUNT.unpack_from(data, offset)
+    offset += SNAPSHOT_COUNT.size
+    bullets.clear()
+    for column in bullets._columns:
+        size = column.itemsize * bullet_count
+        values = array(column.typecode)
+        values.frombytes(data[offset:offset + size])
+        offset += size
+        if column is bullets.spawn_time:
+            values = array('q', (t + now for t in values))
+        del column[:]
+        column.extend(values)
+    bullets.count = bullet_count
+
+    (sing_count,) = SNAPSHOT_COUNT.unpack_from(data, offset)
+    offset += SNAPSHOT_COUNT.size
+    for _ in range(sing_count):
+        radius, alpha = SNAPSHOT_SING.unpack_from(data, offset)
+        offset += SNAPSHOT_SING.size
+        sing = SingAttack(player)
+        sing.radius, sing.alpha = radius, alpha
+        sing.draw_circle()
+        game.all_sprites.add(sing)
+        game.sing_attacks.add(sing)
+
+def save_checkpoint(path, data):
+    """Write a snapshot to disk; the rename keeps an old checkpoint intact if this fails"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as checkpoint_file:
+        checkpoint_file.write(data)
+    os.replace(temp_path, path)
+
+def load_checkpoint(game, path):
+    with open(path, 'rb') as checkpoint_file:
+        load_state(game, checkpoint_file.read())
+
+class SnapshotRing:
+    """Fixed-size history of in-memory snapshots for rolling the game back"""
+    def __init__(self, capacity=None):
+        self.snapshots = deque(maxlen=SNAPSHOT_HISTORY if capacity is None else capacity)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def clear(self):
+        self.snapshots.clear()
+
+    def push(self, game):
+        self.snapshots.append(save_state(game))
+
+    def rollback(self, game, steps=1):
+        """Load the snapshot `steps` entries back and drop it and everything newer; False if the history is too short"""
+        if steps < 1 or steps > len(self.snapshots):
+            return False
+        for _ in range(steps - 1):
+            self.snapshots.pop()
+        # Popped, so the next rewind goes further back instead of to the same moment
+        load_state(game, self.snapshots.pop())
+        return True
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+def measure_allocation(factory, count):
+    """Average bytes tracemalloc sees allocated per object built by factory"""
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    # Build and drop a throwaway batch first: one-time costs (caches, the type's shared
+    # attribute layout, which settles over its first instances) must not be averaged in
+    [factory() for _ in range(count)]
+    gc.collect()
+    start = tracemalloc.get_traced_memory()[0]
+    objects = [factory() for _ in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - start
+    del objects
+    if not was_tracing:
+        tracemalloc.stop()
+    return used / count
+
+def memory_report(game, sample_size=100):
+    """Bytes per entity type, live entity totals and pixel memory held by Surfaces"""
+    player = game.player if game.player is not None else Player()
+    factories = {
+        'Player': Player,
+        'Enemy': lambda: Enemy(player, game.level, (0, 0)),
+        'SingAttack': lambda: SingAttack(player),
+    }
+    live = {
+        'Player': 1 if game.player is not None else 0,
+        'Enemy': len(game.enemies) + len(game.enemy_pool),  # pooled zombies still hold memory
+        'SingAttack': len(game.sing_attacks),
+    }
+    per_entity = {name: measure_allocation(factory, sample_size) for name, factory in factories.items()}
+
+    # Bullets are array slots rather than objects
+    bullets = game.projectiles
+    per_entity['Projectile'] = sum(column.itemsize for column in bullets._columns)
+    live['Projectile'] = bullets.count
+    projectile_capacity = sum(column.itemsize * len(column) for column in bullets._columns)
+
+    # Pixel data lives in SDL, outside tracemalloc, so count it from the Surfaces themselves
+    surfaces = {}
+    for frames_right, frames_left in _animation_cache.values():
+        for frame in frames_right + frames_left:
+            surfaces[id(frame)] = frame
+    for image in bullets.images + list(game.backgrounds.values()) + [game.foreground]:
+        surfaces[id(image)] = image
+    for sing in game.sing_attacks:
+        surfaces[id(sing.image)] = sing.image
+
+    entity_bytes = {name: per_entity[name] * live[name] for name in per_entity}
+    entity_bytes['Projectile'] = projectile_capacity
+    return {
+        'per_entity_bytes': per_entity,
+        'live': live,
+        'entity_bytes': entity_bytes,
+        'surface_bytes': sum(surface_bytes(surface) for surface in surfaces.values()),
+        'mask_bytes': sum(mask.get_size()[0] * mask.get_size()[1] // 8 for mask in FRAME_MASKS.values()),
+    }
+
+def parse_window_size(text):
+    width, _, height = text.lower().partition('x')
+    try:
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT but got '{text}'")
+
 if __name__ == "__main__":
-    game = Game()
-    game.run() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Zombie survival game")
+    parser.add_argument('--bake-assets', action='store_true',
+                        help=f"write {ASSET_BUNDLE_PATH} and exit")
+    parser.add_argument('--threaded', action='store_true',
+                        help="run the simulation on a worker thread and interpolate rendering")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="run the frame loop on asyncio with background I/O between frames")
+    parser.add_argument('--window', type=parse_window_size, metavar='WIDTHxHEIGHT',
+                        help=f"initial window size (the game is drawn at {WINDOW_WIDTH}x{WINDOW_HEIGHT} and scaled)")
+    parser.add_argument('--no-gamepad', action='store_true',
+                        help="keyboard and mouse only; skips starting the joystick subsystem")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print how long each startup phase took")
+    parser.add_argument('--telemetry', metavar='DIR',
+                        help="record gameplay and frame-time events to files in DIR")
+    parser.add_argument('--telemetry-format', choices=('jsonl', 'binary'), default='jsonl')
+    parser.add_argument('--resume', action='store_true',
+                        help=f"continue from the level checkpoint in {CHECKPOINT_PATH}")
+    parser.add_argument('--gc-report', action='store_true',
+                        help="print garbage collection pauses on exit")
+    parser.add_argument('--memory-report', action='store_true',
+                        help="spawn a full level 3 horde, print memory use and exit")
+    args = parser.parse_args()
+    
+    if args.bake_assets:
+        print(f"Wrote {bake_asset_bundle()}")
+        sys.exit(0)
+    
+    if args.memory_report:
+        game = Game(gamepad=False)
+        game.reset_game()
+        game.level = 3
+        for _ in range(LEVEL_3_ENEMIES):
+            game.acquire_enemy(game.level)
+        report = memory_report(game)
+        for name, size in report['per_entity_bytes'].items():
+            print(f"{name:<12}{size:>10.0f} B each  x{report['live'][name]:<5}"
+                  f"{report['entity_bytes'][name] / 1024:>10.1f} KiB")
+        print(f"Surfaces    {report['surface_bytes'] / 1024:>10.1f} KiB")
+        print(f"Masks       {report['mask_bytes'] / 1024:>10.1f} KiB")
+        sys.exit(0)
+    
+    game = Game(gamepad=not args.no_gamepad, window_size=args.window)
+    if args.telemetry:
+        # In async mode the loop flushes telemetry itself
+        game.telemetry = TelemetryWriter(args.telemetry, args.telemetry_format, background=not args.use_async)
+    game.checkpoint_path = CHECKPOINT_PATH
+    if args.resume:
+        try:
+            game.resume_checkpoint(CHECKPOINT_PATH)
+        except (OSError, ValueError, struct.error) as error:
+            parser.error(f"can't resume from {CHECKPOINT_PATH}: {error}")
+    if args.startup_report:
+        for phase, ms in game.startup_timings.items():
+            print(f"{phase:<16}{ms:>8.1f} ms")
+        print(f"{'total':<16}{sum(game.startup_timings.values()):>8.1f} ms")
+    if args.threaded:
+        game.run_threaded()
+    elif args.use_async:
+        asyncio.run(game.run_async())
+    else:
+        game.run()
+    
+    if args.gc_report:
+        for (context, generation), (count, total, worst) in sorted(game.gc_control.report().items()):
+            print(f"{context:<18}gen {generation}  x{count:<6}{total:>9.2f} ms total{worst:>8.2f} ms max")
\ No newline at end of file
@@ -0,0 +1,559 @@
+"""Co-op over local sockets: an authoritative server and interpolating clients.
+
+Example:
+    python netplay.py server --stats
+    python netplay.py client --host 127.0.0.1
+
+The server runs the only simulation and streams delta-compressed snapshots:
+each client gets just the enemy and bullet fields that changed since the last
+snapshot it was sent, with positions quantized to int16. The first client to
+connect controls the soldier and later ones spectate; when the controller
+leaves, the longest-connected spectator takes over.
+"""
+import os
+import argparse
+import selectors
+import socket
+import struct
+import sys
+import time
+
+import pygame
+
+import game
+
+DEFAULT_PORT = 5555
+SNAPSHOT_EVERY = 2  # Server ticks per snapshot (30 per second at 60 FPS)
+SNAPSHOT_BUDGET = 1400  # Bytes of entity updates per snapshot; the rest go out in later ones
+SEND_BACKLOG_LIMIT = 64 * 1024  # Skip new messages to a peer whose socket is this far behind
+POSITION_SCALE = 2  # Positions travel as int16 in half-pixel steps
+
+# Every message is a header followed by a payload of the given type
+MESSAGE_HEADER = struct.Struct('<HB')  # payload length, message type
+MSG_WELCOME = 1
+MSG_INPUT = 2
+MSG_SNAPSHOT = 3
+WELCOME = struct.Struct('<B?')  # client number, controls the soldier
+INPUT = struct.Struct('<HHB')  # held action bits, pressed action bits, flags
+INPUT_RESTART = 1
+# tick, level, flags, health, ammo, kills, enemies for level, player x, y, frame, sing count
+FRAME = struct.Struct('<IBBhBHHhhHB')
+FRAME_TRANSITIONING = 1
+FRAME_GAME_OVER = 2
+FRAME_RECHARGING = 4
+FRAME_PLAYER_FLASHING = 8
+SING = struct.Struct('<hhBB')  # image x, y, radius, alpha
+COUNT = struct.Struct('<H')
+ENTITY_ID = struct.Struct('<H')
+ENTITY_MASK = struct.Struct('<HB')  # id, which fields follow
+FIELD = struct.Struct('<h')
+FIELD_FRAME = struct.Struct('<H')
+FIELD_X, FIELD_Y, FIELD_IMAGE = 1, 2, 4
+
+# Action order for the input bit masks
+ACTIONS = tuple(game.DEFAULT_KEY_BINDINGS)
+SERVER_IGNORED_ACTIONS = frozenset({'quit'})  # A client quitting must not stop the server
+
+def frame_table():
+    """Every animation frame in a fixed order, so frames travel as small integers"""
+    frames = []
+    for folder, filename, frame_count in game.BUNDLED_ANIMATIONS:
+        frames_right, frames_left = game.load_animation(folder, filename, frame_count)
+        frames += frames_right + frames_left
+    return frames
+
+def quantize(value):
+    return max(-32768, min(32767, round(value * POSITION_SCALE)))
+
+def action_bits(actions):
+    return sum(1 << i for i, action in enumerate(ACTIONS) if action in actions)
+
+def bit_actions(bits):
+    return frozenset(action for i, action in enumerate(ACTIONS) if bits & (1 << i))
+
+def pack_message(kind, payload):
+    return MESSAGE_HEADER.pack(len(payload), kind) + payload
+
+def read_messages(buffer):
+    """Split complete messages off the front of a bytearray"""
+    messages = []
+    while len(buffer) >= MESSAGE_HEADER.size:
+        length, kind = MESSAGE_HEADER.unpack_from(buffer)
+        end = MESSAGE_HEADER.size + length
+        if len(buffer) < end:
+            break
+        messages.append((kind, bytes(buffer[MESSAGE_HEADER.size:end])))
+        del buffer[:end]
+    return messages
+
+class EntityIds:
+    """Stable 16-bit ids for server objects while they stay in play"""
+    def __init__(self):
+        self.ids = {}
+        self.next_id = 0
+
+    def update(self, keys):
+        """Ids for this snapshot's keys; keys that left play give their ids back"""
+        live = set(keys)
+        for key in [key for key in self.ids if key not in live]:
+            del self.ids[key]
+        used = set(self.ids.values())
+        for key in keys:
+            if key not in self.ids:
+                while self.next_id in used:
+                    self.next_id = (self.next_id + 1) & 0xFFFF
+                self.ids[key] = self.next_id
+                used.add(self.next_id)
+        return [self.ids[key] for key in keys]
+
+class ClientConnection:
+    def __init__(self, sock, number):
+        self.sock = sock
+        self.number = number
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+        # What this client was last sent, per entity: the base for its next delta
+        self.enemies = {}
+        self.bullets = {}
+        self.last_sent = {}  # (table, id) -> tick, so starved entities go first
+        self.bytes_sent = 0
+
+def encode_entities(client, table, baseline, world, tick, budget):
+    """Removals plus changed fields, oldest updates first, until the budget is spent"""
+    removed = [entity_id for entity_id in baseline if entity_id not in world]
+    for entity_id in removed:
+        del baseline[entity_id]
+        client.last_sent.pop((table, entity_id), None)
+    out = bytearray(COUNT.pack(len(removed)))
+    for entity_id in removed:
+        out += ENTITY_ID.pack(entity_id)
+
+    changed = [entity_id for entity_id, fields in world.items() if baseline.get(entity_id) != fields]
+    changed.sort(key=lambda entity_id: client.last_sent.get((table, entity_id), -1))
+    updates = bytearray()
+    sent = 0
+    for entity_id in changed:
+        if len(updates) >= budget:
+            break  # Stays different from the baseline, so it is sent next time
+        x, y, image = fields = world[entity_id]
+        old = baseline.get(entity_id)
+        mask = FIELD_X | FIELD_Y | FIELD_IMAGE if old is None else (
+            (FIELD_X if old[0] != x else 0) | (FIELD_Y if old[1] != y else 0) | (FIELD_IMAGE if old[2] != image else 0))
+        updates += ENTITY_MASK.pack(entity_id, mask)
+        if mask & FIELD_X:
+            updates += FIELD.pack(x)
+        if mask & FIELD_Y:
+            updates += FIELD.pack(y)
+        if mask & FIELD_IMAGE:
+            updates += FIELD_FRAME.pack(image)
+        baseline[entity_id] = fields
+        client.last_sent[table, entity_id] = tick
+        sent += 1
+    out += COUNT.pack(sent) + updates
+    return bytes(out)
+
+def decode_entities(data, offset, state):
+    """Apply one entity section to a client's id -> [x, y, image] table"""
+    (removed,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(removed):
+        (entity_id,) = ENTITY_ID.unpack_from(data, offset)
+        offset += ENTITY_ID.size
+        state.pop(entity_id, None)
+    (updated,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(updated):
+        entity_id, mask = ENTITY_MASK.unpack_from(data, offset)
+        offset += ENTITY_MASK.size
+        fields = state.setdefault(entity_id, [0, 0, 0])
+        if mask & FIELD_X:
+            (fields[0],) = FIELD.unpack_from(data, offset)
+            offset += FIELD.size
+        if mask & FIELD_Y:
+            (fields[1],) = FIELD.unpack_from(data, offset)
+            offset += FIELD.size
+        if mask & FIELD_IMAGE:
+            (fields[2],) = FIELD_FRAME.unpack_from(data, offset)
+            offset += FIELD_FRAME.size
+    return offset
+
+class GameServer:
+    """Runs the authoritative simulation and streams snapshots to every client"""
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.clock = [0]
+        game.set_time_source(lambda: self.clock[0])
+        self.game = game.Game(gamepad=False)
+        self.game.reset_game()
+        self.frame_ids = {frame: i for i, frame in enumerate(frame_table())}
+        self.enemy_ids = EntityIds()
+        self.bullet_ids = EntityIds()
+
+        self.selector = selectors.DefaultSelector()
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.clients = []  # In connection order; clients[0] controls the soldier
+        self.client_count = 0
+        self.tick = 0  # Every server tick, including ticks with nobody playing
+        self.simulated_ticks = 0  # Ticks the game actually ran; drives the game clock
+        self.tick_ms = []
+        self.snapshot_bytes = []
+
+    @property
+    def controller(self):
+        return self.clients[0] if self.clients else None
+
+    def accept(self):
+        sock, _ = self.listener.accept()
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = ClientConnection(sock, self.client_count)
+        self.client_count += 1
+        self.clients.append(client)
+        self.selector.register(sock, selectors.EVENT_READ, client)
+        client.outbox += pack_message(MSG_WELCOME, WELCOME.pack(client.number & 0xFF, client is self.controller))
+
+    def drop(self, client):
+        was_controller = client is self.controller
+        self.selector.unregister(client.sock)
+        client.sock.close()
+        self.clients.remove(client)
+        if was_controller and self.clients:
+            # Promote the next client
+            self.clients[0].outbox += pack_message(MSG_WELCOME, WELCOME.pack(self.clients[0].number & 0xFF, True))
+
+    def poll_network(self):
+        for key, _ in self.selector.select(timeout=0):
+            if key.data is None:
+                self.accept()
+                continue
+            client = key.data
+            try:
+                data = client.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                continue
+            except OSError:
+                data = b''
+            if not data:
+                self.drop(client)
+                continue
+            client.inbox += data
+            for kind, payload in read_messages(client.inbox):
+                if kind == MSG_INPUT and client is self.controller:
+                    self.handle_input(payload)
+
+    def handle_input(self, payload):
+        held, pressed, flags = INPUT.unpack(payload)
+        if flags & INPUT_RESTART and (self.game.game_over or self.game.player.is_dead):
+            self.game.reset_game()
+        self.game.input_mailbox.post(game.InputState(
+            bit_actions(held) - SERVER_IGNORED_ACTIONS, bit_actions(pressed) - SERVER_IGNORED_ACTIONS,
+            (0, 0), (False, False, False), (), False
+        ))
+
+    def step(self):
+        """One authoritative tick; the world only moves while someone is playing"""
+        if self.controller is None:
+            return
+        start = time.perf_counter()
+        self.simulated_ticks += 1
+        self.clock[0] = int(self.simulated_ticks * 1000 / game.FPS)
+        self.game.apply_input(self.game.input_mailbox.take())
+        self.game.update_world()
+        self.tick_ms.append((time.perf_counter() - start) * 1000)
+
+    def world(self):
+        """Quantized sprite positions and frame ids for everything in play"""
+        g = self.game
+        frame_ids = self.frame_ids
+        enemies = g.enemies.sprites()
+        enemy_world = {
+            entity_id: (quantize(enemy.rect.x + enemy.sprite_offset_x),
+                        quantize(enemy.rect.y + enemy.sprite_offset_y),
+                        frame_ids.get(enemy.image, 0))
+            for entity_id, enemy in zip(self.enemy_ids.update(enemies), enemies)
+        }
+        bullets = g.projectiles
+        count = bullets.count
+        # Bullets have no identity of their own; spawn time and heading tell them apart
+        keys = list(zip(bullets.spawn_time[:count], bullets.dx[:count], bullets.dy[:count]))
+        bullet_world = {
+            entity_id: (quantize(x), quantize(y), frame)
+            for entity_id, x, y, frame in zip(self.bullet_ids.update(keys), bullets.x[:count],
+                                               bullets.y[:count], bullets.frame[:count])
+        }
+        return enemy_world, bullet_world
+
+    def encode_frame(self):
+        g = self.game
+        player = g.player
+        flags = ((FRAME_TRANSITIONING if g.transitioning else 0) | (FRAME_GAME_OVER if g.game_over else 0)
+                 | (FRAME_RECHARGING if player.is_recharging else 0)
+                 | (FRAME_PLAYER_FLASHING if player.is_flashing() else 0))
+        sings = g.sing_attacks.sprites()
+        out = bytearray(FRAME.pack(
+            self.tick & 0xFFFFFFFF, g.level, flags, player.health, player.current_ammo,
+            g.enemies_killed, g.enemies_for_level,
+            quantize(player.rect.x + player.sprite_offset_x), quantize(player.rect.y + player.sprite_offset_y),
+            self.frame_ids.get(player.image, 0), len(sings)
+        ))
+        for sing in sings:
+            out += SING.pack(sing.rect.x, sing.rect.y, min(255, sing.radius), int(sing.alpha))
+        return bytes(out)
+
+    def broadcast(self):
+        frame = self.encode_frame()
+        enemy_world, bullet_world = self.world()
+        for client in self.clients:
+            if len(client.outbox) > SEND_BACKLOG_LIMIT:
+                continue  # Baselines are untouched, so the next delta still applies
+            enemies = encode_entities(client, 'enemy', client.enemies, enemy_world, self.tick, SNAPSHOT_BUDGET // 2)
+            bullets = encode_entities(client, 'bullet', client.bullets, bullet_world, self.tick,
+                                      SNAPSHOT_BUDGET - len(enemies))
+            message = pack_message(MSG_SNAPSHOT, frame + enemies + bullets)
+            client.outbox += message
+            self.snapshot_bytes.append(len(message))
+
+    def flush(self):
+        for client in list(self.clients):
+            if not client.outbox:
+                continue
+            try:
+                sent = client.sock.send(client.outbox)
+            except (BlockingIOError, InterruptedError):
+                continue
+            except OSError:
+                self.drop(client)
+                continue
+            client.bytes_sent += sent
+            del client.outbox[:sent]
+
+    def report(self):
+        tick_ms = sorted(self.tick_ms) or [0.0]
+        sizes = self.snapshot_bytes or [0]
+        print(f"clients {len(self.clients)}  enemies {len(self.game.enemies)}  bullets {len(self.game.projectiles)}  "
+              f"tick p95 {tick_ms[int(len(tick_ms) * 0.95)]:.2f} ms  "
+              f"snapshot avg {sum(sizes) / len(sizes):.0f} B max {max(sizes)} B", file=sys.stderr)
+        self.tick_ms.clear()
+        self.snapshot_bytes.clear()
+
+    def serve(self, stats_every=None):
+        tick_seconds = 1 / game.FPS
+        next_tick = time.perf_counter()
+        next_report = time.perf_counter() + (stats_every or 0)
+        try:
+            while True:
+                self.poll_network()
+                self.step()
+                self.tick += 1
+                if self.tick % SNAPSHOT_EVERY == 0:
+                    self.broadcast()
+                self.flush()
+                if stats_every and time.perf_counter() >= next_report:
+                    self.report()
+                    next_report += stats_every
+                next_tick += tick_seconds
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+        finally:
+            for client in list(self.clients):
+                self.drop(client)
+            self.listener.close()
+            self.game.shutdown()
+
+class GameClient:
+    """Sends input to the server and renders its snapshots, interpolated"""
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, window_size=None, gamepad=True):
+        self.game = game.Game(gamepad=gamepad, window_size=window_size)
+        self.frames = frame_table()
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+        self.controller = False
+        self.enemies = {}
+        self.bullets = {}
+        self.previous_bullets = {}
+        self.sing_images = {}
+        self.connected = True
+        self.snapshots = 0
+        self.bytes_received = 0
+
+    def sing_image(self, radius, alpha):
+        # Same circle SingAttack draws, cached per size and fade
+        image = self.sing_images.get((radius, alpha))
+        if image is None:
+            image = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(image, (147, 0, 211, alpha), (radius, radius), radius, 3)
+            self.sing_images[radius, alpha] = image
+        return image
+
+    def receive(self):
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                data = b''
+            if not data:
+                self.connected = False
+                break
+            self.bytes_received += len(data)
+            self.inbox += data
+        for kind, payload in read_messages(self.inbox):
+            if kind == MSG_WELCOME:
+                _, self.controller = WELCOME.unpack(payload)
+            elif kind == MSG_SNAPSHOT:
+                self.apply_snapshot(payload)
+
+    def apply_snapshot(self, data):
+        g = self.game
+        (_, level, flags, health, ammo, kills, enemies_for_level,
+         player_x, player_y, player_frame, sing_count) = FRAME.unpack_from(data)
+        offset = FRAME.size
+        effects = []
+        for _ in range(sing_count):
+            x, y, radius, alpha = SING.unpack_from(data, offset)
+            offset += SING.size
+            effects.append((self.sing_image(radius, alpha), (x, y)))
+
+        # Zombies that vanish outside a level change were killed
+        before = dict(self.enemies)
+        offset = decode_entities(data, offset, self.enemies)
+        if not flags & FRAME_TRANSITIONING:
+            now = game.get_ticks()
+            for entity_id, (x, y, image) in before.items():
+                if entity_id not in self.enemies:
+                    body_x, body_y = self.frames[image].get_bounding_rect().center
+                    g.effects.death_burst(x / POSITION_SCALE + body_x, y / POSITION_SCALE + body_y, now)
+        self.previous_bullets = {entity_id: tuple(fields) for entity_id, fields in self.bullets.items()}
+        decode_entities(data, offset, self.bullets)
+
+        # The overlays read these straight off the game
+        g.level = level
+        g.enemies_killed = kills
+        g.enemies_for_level = enemies_for_level
+        g.transitioning = bool(flags & FRAME_TRANSITIONING)
+        g.game_over = bool(flags & FRAME_GAME_OVER)
+
+        bullets = []
+        for entity_id, (x, y, frame) in self.bullets.items():
+            previous_x, previous_y, _ = self.previous_bullets.get(entity_id, (x, y, frame))
+            bullets.append((previous_x / POSITION_SCALE, previous_y / POSITION_SCALE,
+                            x / POSITION_SCALE, y / POSITION_SCALE, frame))
+        frames = self.frames
+        g.draw_buffer.publish(game.DrawState(
+            time=time.perf_counter(),
+            level=level,
+            effects=tuple(effects),
+            bullets=tuple(bullets),
+            enemies=tuple((entity_id, frames[image], (x / POSITION_SCALE, y / POSITION_SCALE))
+                          for entity_id, (x, y, image) in self.enemies.items()),
+            particles=(),
+            player=(frames[player_frame], (player_x / POSITION_SCALE, player_y / POSITION_SCALE)),
+            player_flashing=bool(flags & FRAME_PLAYER_FLASHING),
+            hud=game.HudValues(health, game.Player.max_health, level, kills, enemies_for_level,
+                               ammo, game.Player.max_ammo, bool(flags & FRAME_RECHARGING)),
+            transitioning=g.transitioning,
+            game_over=g.game_over,
+        ))
+        self.snapshots += 1
+
+    def send_input(self, controls, restart=False):
+        # Input is resent every frame, so a frame's message can be skipped while
+        # the server is behind; it is never cut short, which would break framing
+        if len(self.outbox) <= SEND_BACKLOG_LIMIT:
+            self.outbox += pack_message(MSG_INPUT, INPUT.pack(
+                action_bits(controls.held), action_bits(controls.pressed), INPUT_RESTART if restart else 0))
+        self.flush()
+
+    def flush(self):
+        if not self.outbox:
+            return
+        try:
+            sent = self.sock.send(self.outbox)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self.connected = False
+            return
+        del self.outbox[:sent]
+
+    def draw_waiting(self):
+        g = self.game
+        g.screen.fill(game.BLACK)
+        text = g.font.render('Waiting for the server...', True, game.WHITE)
+        g.screen.blit(text, text.get_rect(center=(game.WINDOW_WIDTH // 2, game.WINDOW_HEIGHT // 2)))
+
+    def run(self, max_frames=None, scripted_input=None):
+        g = self.game
+        frame = 0
+        while g.running and self.connected and (max_frames is None or frame < max_frames):
+            frame += 1
+            g.clock.tick(game.RENDER_FPS)
+            controls = g.input_handler.poll() if scripted_input is None else scripted_input
+            if controls.quit_requested or controls.was_pressed('quit'):
+                break
+
+            # Only the end screens take clicks: restart asks the server, quit leaves
+            restart = False
+            for window_pos in controls.clicks:
+                mouse_pos = g.renderer.to_canvas(window_pos)
+                if g.game_over or g.transitioning:
+                    if g.restart_button.collidepoint(mouse_pos):
+                        restart = True
+                    elif g.quit_button.collidepoint(mouse_pos):
+                        g.running = False
+            if self.controller:
+                self.send_input(controls, restart)
+
+            self.receive()
+            g.effects.update(game.get_ticks())
+            previous, latest = g.draw_buffer.read()
+            if latest is None:
+                self.draw_waiting()
+            else:
+                g.render_draw_state(previous, latest._replace(particles=tuple(g.effects.blit_sequence())))
+            g.renderer.present()
+        self.sock.close()
+        g.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local co-op: authoritative server or interpolating client")
+    parser.add_argument('mode', choices=('server', 'client'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--stats', type=float, nargs='?', const=5.0, metavar='SECONDS',
+                        help="server: print tick cost and snapshot sizes every few seconds")
+    parser.add_argument('--window', type=game.parse_window_size, metavar='WIDTHxHEIGHT')
+    parser.add_argument('--no-gamepad', action='store_true')
+    parser.add_argument('--frames', type=int, help="client: exit after this many frames")
+    parser.add_argument('--autofire', action='store_true',
+                        help="client: hold fire instead of reading devices (for headless tests)")
+    args = parser.parse_args()
+
+    if args.mode == 'server':
+        # The server never shows a window, and SIGTERM should stop it like Ctrl+C
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+        server = GameServer(args.host, args.port)
+        print(f"Serving on {args.host}:{args.port}", file=sys.stderr)
+        try:
+            server.serve(args.stats)
+        except KeyboardInterrupt:
+            pass
+    else:
+        client = GameClient(args.host, args.port, args.window, gamepad=not args.no_gamepad)
+        scripted = None
+        if args.autofire:
+            scripted = game.InputState(frozenset({'fire'}), frozenset(), (0, 0), (False, False, False), (), False)
+        client.run(args.frames, scripted)
+        print(f"{client.snapshots} snapshots, {client.bytes_received / 1024:.1f} KiB received", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+# Headless: no window and no audio device; set before game starts SDL
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+# The game modules live in the repo root and load assets relative to it
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import game
+
+@pytest.fixture
+def clock():
+    """Manual gameplay clock in ms; advance it by assigning clock[0]"""
+    ticks = [1000]
+    game.set_time_source(lambda: ticks[0])
+    yield ticks
+    game.set_time_source(game._monotonic_ticks)
+
+@pytest.fixture
+def new_game(clock):
+    """A Game at the start of level 1, on the manual clock"""
+    g = game.Game(gamepad=False)
+    g.reset_game()
+    yield g
+    g.gc_control.close()
@@ -0,0 +1,20 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import game
+
+def test_prefetch_decodes_off_thread_and_installs_once(new_game, monkeypatch):
+    # Start from empty caches so every sheet goes through the executor
+    monkeypatch.setattr(game, '_animation_cache', {})
+    monkeypatch.setattr(game, 'FRAME_MASKS', {})
+    monkeypatch.setattr(game, '_zombie_kinds', {})
+
+    with ThreadPoolExecutor(2) as executor:
+        asyncio.run(new_game.prefetch_assets(executor))
+
+    assert set(game._zombie_kinds) == set(game.ZOMBIE_TYPES)
+    for name, zombie_type in game.ZOMBIE_TYPES.items():
+        kind = game.get_zombie_kind(name)
+        # The kind and later loads share the one cached frame list
+        assert game.load_animation(zombie_type.folder, *zombie_type.walk)[0] is kind.walk_right
+        assert all(frame in game.FRAME_MASKS for frame in kind.walk_right + kind.attack_left)
@@ -0,0 +1,20 @@
+import pytest
+
+import balance_sweep
+
+def test_integer_parameters_take_whole_numbers():
+    assert balance_sweep.check_parameters([('shot_delay', [150.0, 250])]) == [('shot_delay', [150, 250])]
+    with pytest.raises(ValueError, match='whole numbers'):
+        balance_sweep.check_parameters([('enemy_spawn_delay', [750.5])])
+
+def test_float_constants_are_converted():
+    assert balance_sweep.check_parameters([('PARTICLE_DRAG', [1, 0.9])]) == [('PARTICLE_DRAG', [1.0, 0.9])]
+
+@pytest.mark.parametrize('name', ['BURST_COUNT', 'BURST_DELAY', 'RENDER_FPS', 'SNAPSHOT_VERSION'])
+def test_constants_without_gameplay_effect_are_rejected(name):
+    with pytest.raises(ValueError, match='no gameplay effect'):
+        balance_sweep.check_parameters([(name, [1, 2])])
+
+def test_unknown_parameters_are_rejected():
+    with pytest.raises(ValueError, match='unknown'):
+        balance_sweep.check_parameters([('NOT_A_CONSTANT', [1])])
@@ -0,0 +1,66 @@
+import pytest
+
+import game
+
+def test_segment_starting_inside_the_box_hits_at_once():
+    assert game.segment_box_entry(120, 120, 50, 0, 100, 100, 150, 150) == 0.0
+
+def test_segment_reports_where_it_enters():
+    assert game.segment_box_entry(0, 120, 200, 0, 100, 100, 150, 150) == pytest.approx(0.5)
+    assert game.segment_box_entry(120, 0, 0, 200, 100, 100, 150, 150) == pytest.approx(0.5)
+
+def test_segment_that_stops_short_misses():
+    assert game.segment_box_entry(0, 120, 50, 0, 100, 100, 150, 150) is None
+    # Parallel to the box and beside it
+    assert game.segment_box_entry(0, 90, 300, 0, 100, 100, 150, 150) is None
+
+def fire(g, start, end, current_time):
+    """Put one bullet in flight that covers start -> end this tick"""
+    g.projectiles.spawn(start[0], start[1], (1, 0), current_time)
+    g.projectiles.x[g.projectiles.count - 1] = end[0]
+    g.projectiles.y[g.projectiles.count - 1] = end[1]
+
+def body_box(enemy):
+    """Screen rect around the opaque pixels of the enemy's current frame"""
+    sprite = enemy.sprite_rect()
+    return game.FRAME_MASKS[enemy.image].get_bounding_rects()[0].move(sprite.topleft)
+
+def sweep(g, enemy, y):
+    """Box entry and mask contact for a horizontal shot across the enemy at height y"""
+    bullets = g.projectiles
+    half_w, half_h = bullets.half_sizes[0]
+    sprite = enemy.sprite_rect()
+    x0, dx = sprite.left - 100, sprite.width + 200
+    t = game.segment_box_entry(x0, y, dx, 0,
+                               sprite.left - half_w, sprite.top - half_h,
+                               sprite.right + half_w, sprite.bottom + half_h)
+    contact = game.mask_contact_time(bullets.masks[0], x0, y, dx, 0, t,
+                                     game.FRAME_MASKS[enemy.image], sprite.topleft)
+    return t, contact
+
+def test_shot_through_a_transparent_corner_misses(new_game, clock):
+    enemy = new_game.acquire_enemy(1, (300, 200))
+    # Inside the sprite box but well above the drawn body
+    y = enemy.sprite_rect().top + 1
+    assert y + new_game.projectiles.half_sizes[0][1] < body_box(enemy).top
+    t, contact = sweep(new_game, enemy, y)
+    assert t is not None
+    assert contact is None
+
+def test_shot_through_the_body_hits_after_box_entry(new_game, clock):
+    enemy = new_game.acquire_enemy(1, (300, 200))
+    t, contact = sweep(new_game, enemy, body_box(enemy).centery)
+    assert contact is not None
+    assert t < contact < 1
+
+def test_earliest_hit_wins_when_two_enemies_share_a_path(new_game, clock):
+    # Spawn the far one first so list order disagrees with hit order
+    far = new_game.acquire_enemy(1, (450, 200))
+    near = new_game.acquire_enemy(1, (300, 200))
+    y = body_box(near).centery
+    fire(new_game, (200, y), (600, y), clock[0])
+
+    assert new_game.resolve_projectile_hits(clock[0]) == 1
+    assert not near.alive()
+    assert far.alive()
+    assert len(new_game.projectiles) == 0
@@ -0,0 +1,23 @@
+import game
+
+def test_kill_effects_are_stamped_with_the_tick_time(new_game, clock):
+    # Like the wall clock, every read is a little later than the one before
+    def wall_clock():
+        clock[0] += 1
+        return clock[0]
+    game.set_time_source(wall_clock)
+
+    clock[0] += new_game.player.sing_cooldown
+    enemy = new_game.acquire_enemy(1, new_game.player.rect.topleft)
+    new_game.player.sing_attack(new_game)
+    for _ in range(30):
+        new_game.update_world()
+        if not enemy.alive():
+            break
+    assert not enemy.alive()
+    assert len(new_game.effects)
+
+    # Clock moved on: the burst keeps animating from its first frame
+    clock[0] += 50
+    new_game.effects.update(clock[0])
+    assert len(new_game.effects)
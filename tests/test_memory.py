@@ -0,0 +1,36 @@
+import pygame
+
+import game
+
+class DictEnemy(pygame.sprite.Sprite):
+    """Enemy's fields in a per-instance dict: the layout its slots replace"""
+    reset = game.Enemy.reset
+
+    def __init__(self, player, level, position=None):
+        super().__init__()
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(player, level, position)
+
+def test_memory_report_counts_pooled_zombies(new_game):
+    new_game.level = 3
+    for _ in range(100):
+        new_game.acquire_enemy(new_game.level)
+    # Zombies back in the pool still hold their memory
+    for enemy in new_game.enemies.sprites()[:40]:
+        new_game.release_enemy(enemy)
+
+    report = game.memory_report(new_game)
+    assert len(new_game.enemies) == 60
+    assert report['live']['Enemy'] == 100
+    assert report['entity_bytes']['Enemy'] == report['per_entity_bytes']['Enemy'] * 100
+
+def test_enemy_layout_stays_slotted(new_game):
+    enemy = new_game.acquire_enemy(1)
+    # Only pygame's own group bookkeeping may live in the instance dict
+    assert not set(vars(enemy)) & set(game.Enemy.__slots__)
+
+    player = new_game.player
+    slotted = game.measure_allocation(lambda: game.Enemy(player, 1, (0, 0)), 100)
+    dict_backed = game.measure_allocation(lambda: DictEnemy(player, 1, (0, 0)), 100)
+    assert slotted < dict_backed
+    assert game.memory_report(new_game)['per_entity_bytes']['Enemy'] == slotted
@@ -0,0 +1,51 @@
+import netplay
+
+def send(client, state, world, tick, budget=netplay.SNAPSHOT_BUDGET):
+    """Encode world against the client's baseline and apply it to the client's state"""
+    data = netplay.encode_entities(client, 'enemy', client.enemies, world, tick, budget)
+    assert netplay.decode_entities(data, 0, state) == len(data)
+    return data
+
+def test_entity_round_trip_with_removals():
+    client = netplay.ClientConnection(None, 0)
+    state = {}
+    world = {0: (10, 20, 1), 1: (30, 40, 2), 2: (50, 60, 3)}
+    send(client, state, world, 1)
+    assert state == {entity_id: list(fields) for entity_id, fields in world.items()}
+
+    # One moves, one changes frame only, one leaves play
+    world = {0: (12, 20, 1), 2: (50, 60, 4)}
+    data = send(client, state, world, 2)
+    assert state == {0: [12, 20, 1], 2: [50, 60, 4]}
+    # Unchanged fields are not resent
+    assert len(data) < len(send(netplay.ClientConnection(None, 0), {}, world, 2))
+
+def test_recycled_id_replaces_the_old_entity():
+    ids = netplay.EntityIds()
+    first, second = object(), object()
+    assert ids.update([first, second]) == [0, 1]
+    replacement = object()
+    # The id given back by `second` goes to the newcomer
+    assert ids.update([first, replacement]) == [0, 1]
+
+    client = netplay.ClientConnection(None, 0)
+    state = {}
+    send(client, state, {0: (10, 10, 1), 1: (100, 100, 5)}, 1)
+    send(client, state, {0: (10, 10, 1), 1: (300, 100, 9)}, 2)
+    assert state == {0: [10, 10, 1], 1: [300, 100, 9]}
+
+def test_budget_overflow_catches_up_on_later_snapshots():
+    client = netplay.ClientConnection(None, 0)
+    state = {}
+    world = {entity_id: (entity_id, entity_id * 2, entity_id % 7) for entity_id in range(200)}
+    budget = 100
+    send(client, state, world, 1, budget)
+    assert 0 < len(state) < len(world)
+
+    # Entities left out still differ from their baseline, so later snapshots send them
+    before = len(state)
+    send(client, state, world, 2, budget)
+    assert len(state) > before
+    for tick in range(3, 20):
+        send(client, state, world, tick, budget)
+    assert state == {entity_id: list(fields) for entity_id, fields in world.items()}
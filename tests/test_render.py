@@ -0,0 +1,10 @@
+import game
+
+def test_threaded_overlays_match_the_published_hud(new_game):
+    new_game.game_over = True
+    state = new_game.build_draw_state()
+    # The simulation moves on after publishing; the frame must still show what it published
+    new_game.level, new_game.enemies_killed = 3, 99
+
+    new_game.render_draw_state(None, state)
+    assert new_game.overlays['game_over'][0] == (state.hud.level, state.hud.enemies_killed)
@@ -0,0 +1,115 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import game
+
+def controls(tick):
+    # Circle around while firing, with a sing now and then
+    held = {'fire', ('move_left', 'move_up', 'move_right', 'move_down')[tick // 20 % 4]}
+    pressed = {'sing'} if tick % 45 == 0 else set()
+    return game.InputState(frozenset(held | pressed), frozenset(pressed), (0, 0), (False, False, False), (), False)
+
+def play(g, clock, ticks, start=0):
+    for tick in range(start, start + ticks):
+        clock[0] += 16
+        g.apply_input(controls(tick))
+        g.update_world()
+
+def test_save_load_save_is_byte_identical(new_game, clock):
+    play(new_game, clock, 300)
+    assert len(new_game.enemies) and len(new_game.projectiles)
+    data = game.save_state(new_game)
+    game.load_state(new_game, data)
+    assert game.save_state(new_game) == data
+
+def test_replay_from_snapshot_is_deterministic(new_game, clock):
+    play(new_game, clock, 200)
+    start_time = clock[0]
+    data = game.save_state(new_game)
+    play(new_game, clock, 200, start=200)
+    expected = game.save_state(new_game)
+
+    clock[0] = start_time
+    game.load_state(new_game, data)
+    play(new_game, clock, 200, start=200)
+    assert game.save_state(new_game) == expected
+
+def test_rewind_steps_further_back_each_time(new_game, clock):
+    play(new_game, clock, game.SNAPSHOT_INTERVAL * 3)
+    history = list(new_game.snapshots.snapshots)
+    assert len(history) == 3
+
+    assert new_game.snapshots.rollback(new_game)
+    assert game.save_state(new_game) == history[-1]
+    assert new_game.snapshots.rollback(new_game)
+    assert game.save_state(new_game) == history[-2]
+    assert len(new_game.snapshots) == 1
+
+def test_level_checkpoint_resumes_from_disk(new_game, clock, tmp_path):
+    path = str(tmp_path / 'checkpoint.bin')
+    new_game.checkpoint_path = path
+    new_game.enemies_killed = new_game.enemies_for_level
+    new_game.check_level_up()
+    clock[0] += new_game.transition_delay
+    new_game.handle_level_transition()
+    assert new_game.level == 2
+
+    resumed = game.Game(gamepad=False)
+    try:
+        resumed.resume_checkpoint(path)
+        assert resumed.level == 2
+        assert not resumed.in_main_menu
+        assert resumed.level_checkpoint == new_game.level_checkpoint
+    finally:
+        resumed.gc_control.close()
+
+def test_retry_from_game_over_counts_as_gameplay_again(new_game, clock):
+    new_game.player.health = 0
+    new_game.player.die()
+    clock[0] += new_game.player.death_duration
+    new_game.update_world()
+    assert new_game.game_over
+    assert new_game.gc_control.context == 'game over'
+
+    new_game.apply_input(game.InputState(frozenset({'retry_level'}), frozenset({'retry_level'}),
+                                         (0, 0), (False, False, False), (), False))
+    assert not new_game.game_over and not new_game.player.is_dead
+    assert new_game.gc_control.context == 'gameplay'
+
+def test_retry_and_rewind_drop_the_abandoned_attempt_from_level_stats(new_game, clock):
+    play(new_game, clock, game.SNAPSHOT_INTERVAL)
+    assert len(new_game.snapshots) == 1
+    started = new_game.level_started
+    new_game.level_damage += 5
+    clock[0] += 1000
+
+    # Rewinding restores the level's time and damage as of the snapshot
+    assert new_game.snapshots.rollback(new_game)
+    assert new_game.level_damage == 0
+    assert new_game.level_started == started + 1000
+
+    new_game.level_damage += 5
+    new_game.apply_input(game.InputState(frozenset({'retry_level'}), frozenset({'retry_level'}),
+                                         (0, 0), (False, False, False), (), False))
+    assert new_game.level_damage == 0
+    assert new_game.level_started == clock[0]
+
+def test_async_mode_writes_checkpoints_off_the_frame_in_order(new_game, clock, tmp_path):
+    path = tmp_path / 'checkpoint.bin'
+    new_game.checkpoint_path = str(path)
+    new_game.defer_file_writes = True
+    new_game.checkpoint_level()
+    assert not path.exists()
+
+    first = new_game.level_checkpoint
+    play(new_game, clock, 10)
+    new_game.checkpoint_level()
+    second = new_game.level_checkpoint
+
+    async def write_both():
+        lock = asyncio.Lock()
+        with ThreadPoolExecutor(2) as executor:
+            await asyncio.gather(new_game.write_checkpoint(executor, lock, first),
+                                 new_game.write_checkpoint(executor, lock, second))
+    asyncio.run(write_both())
+    assert path.read_bytes() == second
@@ -0,0 +1,44 @@
+import pytest
+
+import game
+
+# One of each event; frame times are exact in a 32-bit float
+EVENTS = [
+    ('level_start', 1),
+    ('kill', 1, 2, True),
+    ('damage', 5, 95, 1),
+    ('level_complete', 1, 41234, 15),
+    ('frame', 1.5, 0.25),
+    ('death', 2, 17),
+]
+
+def write_events(directory, file_format, clock, **options):
+    writer = game.TelemetryWriter(str(directory), file_format, background=False, **options)
+    for event, *values in EVENTS:
+        clock[0] += 16
+        writer.record(event, *values)
+    writer.close()
+    return [event for path in writer.paths for event in game.read_telemetry(path)]
+
+@pytest.mark.parametrize('file_format', ['jsonl', 'binary'])
+def test_telemetry_round_trip(tmp_path, clock, file_format):
+    events = write_events(tmp_path, file_format, clock)
+    assert [event['event'] for event in events] == [event for event, *_ in EVENTS]
+    assert events[1] == {'event': 'kill', 't': 1032, 'level': 1, 'zombie_type': 2, 'by_sing': True}
+    assert type(events[0]['level']) is int
+    assert type(events[3]['duration_ms']) is int
+    assert type(events[4]['update_ms']) is float
+
+def test_both_formats_decode_to_the_same_events(tmp_path, clock):
+    start = clock[0]
+    jsonl = write_events(tmp_path / 'jsonl', 'jsonl', clock)
+    clock[0] = start
+    binary = write_events(tmp_path / 'binary', 'binary', clock)
+    # 1 == 1.0 == True, so compare the types as well
+    typed = lambda events: [{name: (value, type(value)) for name, value in event.items()} for event in events]
+    assert typed(jsonl) == typed(binary)
+
+def test_full_ring_reports_dropped_events(tmp_path, clock):
+    events = write_events(tmp_path, 'binary', clock, capacity=4)
+    assert [event['event'] for event in events] == ['level_start', 'kill', 'damage', 'level_complete', 'dropped']
+    assert events[-1]['count'] == 2